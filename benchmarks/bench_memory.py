@@ -0,0 +1,148 @@
+"""Benchmark de memória da listagem exibida.
+
+Mede, em um processo novo para cada forma, quanto a memória residente do
+processo cresce ao carregar a listagem numa janela visível (plataforma Qt
+offscreen): a QTreeWidget com um item e sete textos formatados por arquivo,
+como era antes, e a QTableView sobre o FileListModel usada pelo programa.
+
+Uso: python benchmarks/bench_memory.py [--rows 1000000]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CATEGORIES = ["Projetos", "Financeiro", "Fotos", "Outros"]
+TYPES = ["PDF", "Imagem", "Texto", "Desenho CAD"]
+
+
+def fresh(text):
+    # Novo objeto str a cada chamada, como o sqlite3 devolve em cada linha
+    return text.encode().decode()
+
+
+def generate_rows(rows):
+    """Linhas no formato de LISTING_COLUMNS"""
+    start = datetime(2024, 1, 1)
+    for i in range(rows):
+        date = (start + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+        yield (rows - i, f"arquivo_{i}.pdf", i * 37 % 10_000_000,
+               fresh(TYPES[i % len(TYPES)]), fresh(CATEGORIES[i % len(CATEGORIES)]), date)
+
+
+def resident_memory():
+    """Memória residente do processo em bytes"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        import resource
+        # ru_maxrss é o pico; serve aqui porque a listagem só cresce durante a medição
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def batches(rows, batch_size):
+    """Lotes de FileListCache, como os enviados pela FileSearchThread"""
+    from main import FileListCache
+    pending = []
+    for row in generate_rows(rows):
+        pending.append(row)
+        if len(pending) == batch_size:
+            batch = FileListCache()
+            batch.append_rows(pending)
+            yield batch
+            pending = []
+    if pending:
+        batch = FileListCache()
+        batch.append_rows(pending)
+        yield batch
+
+
+def load_tree_widget(app, rows):
+    """Listagem anterior: um QTreeWidgetItem com os textos formatados por arquivo"""
+    from PyQt5 import QtCore, QtWidgets
+    import main
+    tree = QtWidgets.QTreeWidget()
+    tree.setColumnCount(7)
+    tree.show()
+    app.processEvents()
+    before = resident_memory()
+    for files in batches(rows, main.LOAD_BATCH_SIZE):
+        for i in range(len(files)):
+            date_added = files.date(i)
+            item = QtWidgets.QTreeWidgetItem(tree)
+            item.setText(0, str(files.ids[i]))
+            item.setText(1, files.names[i])
+            item.setText(2, main.MainApp.format_file_size(None, files.sizes[i]))
+            item.setText(3, files.types[i])
+            item.setText(4, files.categories[i])
+            item.setText(5, main.MainApp.format_date(None, date_added) if date_added else "")
+            item.setText(6, "📥 Download")
+            item.setData(0, QtCore.Qt.UserRole, files.ids[i])
+        app.processEvents()
+    return tree, before
+
+
+def load_model_view(app, rows):
+    """Listagem atual: QTableView sobre o FileListModel, texto formatado em data()"""
+    from PyQt5 import QtWidgets
+    import main
+    model = main.FileListModel(lambda size: main.MainApp.format_file_size(None, size),
+                               lambda date: main.MainApp.format_date(None, date))
+    view = QtWidgets.QTableView()
+    view.setModel(model)
+    view.verticalHeader().hide()
+    view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+    view.show()
+    app.processEvents()
+    before = resident_memory()
+    for files in batches(rows, main.LOAD_BATCH_SIZE):
+        model.append_files(files)
+        app.processEvents()
+    return (model, view), before
+
+
+def measure_once(kind, rows):
+    """Executado no processo filho: imprime o crescimento da memória em bytes"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, ROOT)
+    from PyQt5 import QtWidgets
+    app = QtWidgets.QApplication(sys.argv)
+    load = load_tree_widget if kind == "tree" else load_model_view
+    listing, before = load(app, rows)
+    # Rolar até o fim para desenhar também as últimas linhas
+    view = listing[1] if isinstance(listing, tuple) else listing
+    view.scrollToBottom()
+    app.processEvents()
+    print(resident_memory() - before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--child", choices=("tree", "model"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure_once(args.child, args.rows)
+        return 0
+
+    print(f"{args.rows} linhas")
+    print(f"{'listagem':<32}{'memória (MB)':>14}{'bytes/linha':>14}")
+    results = {}
+    for label, kind in (("QTreeWidget + itens", "tree"), ("QTableView + FileListModel", "model")):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", kind, "--rows", str(args.rows)],
+            capture_output=True, text=True, check=True).stdout
+        results[kind] = int(output.split()[-1])
+        print(f"{label:<32}{results[kind] / 2**20:>14.1f}{results[kind] / args.rows:>14.0f}")
+    print(f"Redução: {results['tree'] / max(results['model'], 1):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Benchmark de abertura do programa.
+
+Cria um banco de dados sintético numa pasta temporária e mede, em um processo
+novo para cada rodada, quanto tempo leva para a janela aparecer com a primeira
+tela de arquivos e quanto tempo leva para a carga completa terminar.
+
+Uso: python benchmarks/bench_startup.py [--rows 100000] [--budget-ms 1000]
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def create_database(db_path, rows):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            original_name TEXT NOT NULL,
+            stored_name TEXT NOT NULL,
+            file_path TEXT NOT NULL,
+            file_size INTEGER,
+            file_type TEXT,
+            category TEXT,
+            tags TEXT,
+            description TEXT,
+            date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_accessed TIMESTAMP)''')
+    start = datetime(2024, 1, 1)
+    categories = ["Projetos", "Financeiro", "Fotos", "Outros"]
+    types = ["PDF", "Imagem", "Texto", "Desenho CAD"]
+
+    def generate():
+        for i in range(rows):
+            date = (start + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+            name = f"arquivo_{i}.dat"
+            yield (name, name, os.path.join("arquivos_armazenados", name), i * 37 % 10_000_000,
+                   types[i % len(types)], categories[i % len(categories)], "", "", date, date)
+
+    cursor.executemany('''
+        INSERT INTO files
+        (original_name, stored_name, file_path, file_size, file_type, category, tags, description, date_added, last_accessed)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', generate())
+    conn.commit()
+    conn.close()
+
+
+def measure_once():
+    """Executado no processo filho: abre a janela e imprime os tempos em ms"""
+    start = time.perf_counter()
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, ROOT)
+    from PyQt5 import QtWidgets
+    import main
+    imported = time.perf_counter()
+
+    app = QtWidgets.QApplication(sys.argv)
+    window = main.MainApp()
+    window.show()
+    app.processEvents()
+    shown = time.perf_counter()
+
+    while window.search_thread is None or not window.search_thread.isFinished():
+        app.processEvents()
+        time.sleep(0.001)
+    app.processEvents()
+    loaded = time.perf_counter()
+
+    rows = window.file_model.rowCount()
+    print(f"{(imported - start) * 1000:.1f} {(shown - start) * 1000:.1f} {(loaded - start) * 1000:.1f} {rows}")
+    window.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--budget-ms", type=float, default=1000.0,
+                        help="tempo máximo aceito até a janela ficar utilizável")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure_once()
+        return 0
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        create_database(os.path.join(work_dir, "file_database.db"), args.rows)
+        print(f"Banco sintético com {args.rows} arquivos")
+        print(f"{'rodada':<22}{'import':>10}{'janela':>10}{'carga':>10}{'linhas':>10}")
+        within_budget = True
+        # A primeira rodada não tem snapshot; a segunda usa o gravado pela primeira
+        for label in ("sem snapshot", "com snapshot"):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child"],
+                cwd=work_dir, capture_output=True, text=True, check=True).stdout
+            imported, shown, loaded, rows = output.split()[-4:]
+            print(f"{label:<22}{imported:>10}{shown:>10}{loaded:>10}{rows:>10}")
+            within_budget = within_budget and float(shown) <= args.budget_ms
+    print("Dentro do orçamento" if within_budget else f"Acima do orçamento de {args.budget_ms:.0f} ms")
+    return 0 if within_budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,136 +1,986 @@
 import sys
 import os
+import io
+import heapq
+import json
 import shutil
 import sqlite3
+import threading
+import time
+from array import array
 from datetime import datetime
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtCore import QThread, pyqtSignal
 from banco_de_arquivos import Ui_telaPrincipal
 from PyQt5.QtWidgets import QFileDialog, QMessageBox, QInputDialog, QMenu, QAction, QDialog, QVBoxLayout, QLabel, QProgressBar
 
+# Quantidade de arquivos recentes guardados no snapshot exibido na abertura
+STARTUP_SNAPSHOT_ROWS = 200
+# Quantidade de linhas lidas do banco por lote durante a carga em segundo plano
+LOAD_BATCH_SIZE = 500
+# Colunas lidas para a listagem; os detalhes completos são buscados pelo id quando necessário
+LISTING_COLUMNS = "id, original_name, file_size, file_type, category, date_added"
+# Duplicatas: arquivos físicos cujo tamanho se repete e religação de uma cópia ao arquivo mantido
+DUPLICATE_CANDIDATES_QUERY = '''
+    SELECT id, original_name, file_path, file_size, date_added FROM files
+    WHERE file_size > 0 AND file_size IN (
+        SELECT file_size FROM files GROUP BY file_size HAVING COUNT(DISTINCT file_path) > 1)
+    ORDER BY file_size, id'''
+RELINK_FILE_QUERY = 'UPDATE files SET stored_name = ?, file_path = ? WHERE file_path = ?'
+# Intervalo entre gravações dos acessos acumulados em memória
+ACCESS_FLUSH_INTERVAL = 5.0
+# Quantidade de arquivos exibidos nas visões "Usados recentemente" e "Mais usados"
+USAGE_VIEW_LIMIT = 500
+# Backup: arquivo com a lista de snapshots e tamanho dos blocos copiados
+BACKUP_INDEX_NAME = "backups.json"
+BACKUP_COPY_CHUNK = 1024 * 1024
+# Limite padrão de cópia do backup, para não atrapalhar o uso do programa
+BACKUP_DEFAULT_MB_PER_SECOND = 20
+# Tamanho dos blocos do início e do fim usados no hash parcial das duplicatas
+DUPLICATE_BLOCK_SIZE = 64 * 1024
+# Pesquisa no conteúdo: extensões de texto pesquisadas, tamanho máximo indexado
+# na ingestão, texto lido por transação de indexação e intervalo entre os envios de resultados para a interface
+CONTENT_SEARCH_EXTENSIONS = ('.txt', '.csv', '.dxf')
+CONTENT_INDEX_MAX_BYTES = 16 * 1024 * 1024
+CONTENT_INDEX_BATCH_BYTES = 32 * 1024 * 1024
+CONTENT_SEARCH_EMIT_INTERVAL = 0.2
+# Tarefas em segundo plano: tipo de E/S, limite de execução simultânea por tipo,
+# prioridades, estados exibidos no painel e intervalo de atualização da vazão
+JOB_READER = "leitura"
+JOB_WRITER = "gravação"
+JOB_MAX_READERS = 3
+JOB_MAX_WRITERS = 1
+JOB_PRIORITY_LOW = 0
+JOB_PRIORITY_NORMAL = 1
+JOB_PRIORITY_HIGH = 2
+JOB_QUEUED = "Na fila"
+JOB_RUNNING = "Executando"
+JOB_PAUSED = "Pausado"
+JOB_DONE = "Concluído"
+JOB_CANCELLED = "Cancelado"
+JOB_FAILED = "Erro"
+JOBS_PANEL_REFRESH_MS = 1000
+# Manutenção periódica do banco: intervalo, páginas liberadas por execução e
+# quantidade mínima de páginas livres para rodar o incremental_vacuum
+MAINTENANCE_INTERVAL_MS = 30 * 60 * 1000
+MAINTENANCE_VACUUM_PAGES = 2000
+MAINTENANCE_VACUUM_MIN_PAGES = 100
+# Estatísticas do planejador: tabelas acompanhadas, variação de linhas que as
+# torna desatualizadas e linhas lidas por índice no ANALYZE periódico
+MAINTENANCE_STATS_TABLES = ('files', 'file_hashes')
+MAINTENANCE_STATS_STALE_RATIO = 0.25
+MAINTENANCE_ANALYSIS_LIMIT = 1000
 
-class ProgressDialog(QDialog):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("Processando Arquivos")
-        self.setFixedSize(400, 120)
-        self.setModal(True)
-                # Carregar ícone de arquivo externo
-        try:
-            icon = QtGui.QIcon("logoSpike.png")  # Ou .ico, .jpg, etc.
-            self.setWindowIcon(icon)
-        except:
-            # Fallback para ícone simples se o arquivo não existir
-            pixmap = QtGui.QPixmap(32, 32)
-            pixmap.fill(QtGui.QColor("#0078d4"))
-            self.setWindowIcon(QtGui.QIcon(pixmap)) 
-        layout = QVBoxLayout()
-        self.status_label = QLabel("Iniciando processamento...")
-        layout.addWidget(self.status_label)
-        self.progress_bar = QProgressBar()
-        self.progress_bar.setRange(0, 100)
-        self.progress_bar.setValue(0)
-        layout.addWidget(self.progress_bar)
-        self.cancel_button = QtWidgets.QPushButton("Cancelar")
-        self.cancel_button.clicked.connect(self.cancel_operation)
-        layout.addWidget(self.cancel_button)
-        self.setLayout(layout)
-        self.is_cancelled = False
-        
-    def cancel_operation(self):
-        self.is_cancelled = True
-        self.status_label.setText("Cancelando operação...")
-        self.cancel_button.setEnabled(False)
+
+def migrate_create_files(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            original_name TEXT NOT NULL,
+            stored_name TEXT NOT NULL,
+            file_path TEXT NOT NULL,
+            file_size INTEGER,
+            file_type TEXT,
+            category TEXT,
+            tags TEXT,
+            description TEXT,
+            date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_accessed TIMESTAMP)''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_date_added ON files (date_added)')
+
+
+def migrate_access_tracking(cursor):
+    # Bancos criados antes do controle de versão podem já ter a coluna
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(files)')]
+    if 'access_count' not in columns:
+        cursor.execute('ALTER TABLE files ADD COLUMN access_count INTEGER NOT NULL DEFAULT 0')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_last_accessed ON files (last_accessed)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_access_count ON files (access_count, last_accessed)')
+
+
+def migrate_file_hashes(cursor):
+    # Hashes calculados na busca de duplicatas, por arquivo físico
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS file_hashes (
+            file_path TEXT PRIMARY KEY,
+            file_size INTEGER,
+            mtime REAL,
+            partial_hash TEXT,
+            full_hash TEXT)''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_file_size ON files (file_size)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_file_path ON files (file_path)')
+
+
+def migrate_content_index(cursor):
+    # Índice do texto dos arquivos pesquisáveis (rowid = id do arquivo); o
+    # tokenizador trigram permite buscar trechos com LIKE e exige SQLite 3.34+
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS file_content USING fts5(body, tokenize='trigram')")
+    except sqlite3.OperationalError:
+        pass
+
+
+def migrate_incremental_vacuum(cursor):
+    # Bancos antigos precisam de um VACUUM completo para mudar o modo de auto_vacuum
+    if cursor.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        cursor.execute('VACUUM')
+
+
+def migrate_casefold_content_index(cursor):
+    # O texto indexado passa a ser guardado em casefold, como o termo pesquisado
+    if cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'file_content'").fetchone()[0]:
+        cursor.connection.create_function("casefold", 1, str.casefold, deterministic=True)
+        cursor.execute('UPDATE file_content SET body = casefold(body)')
+
+
+def migrate_partial_recent_index(cursor):
+    # Os arquivos recebem last_accessed na importação, então o índice completo
+    # obrigava a percorrer todos os arquivos nunca abertos; o parcial só tem os abertos
+    cursor.execute('DROP INDEX IF EXISTS idx_files_last_accessed')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_recent ON files (last_accessed) WHERE access_count > 0')
+
+
+# Migrações do esquema, em ordem; PRAGMA user_version guarda quantas já foram
+# aplicadas. Cada item é (função, roda dentro de transação). Nunca altere ou
+# remova uma migração já publicada: acrescente uma nova no final.
+MIGRATIONS = [
+    (migrate_create_files, True),
+    (migrate_access_tracking, True),
+    (migrate_file_hashes, True),
+    (migrate_content_index, True),
+    (migrate_incremental_vacuum, False),
+    (migrate_casefold_content_index, True),
+    (migrate_partial_recent_index, True),
+]
 
 
 class DatabaseManager:
-    def __init__(self, db_path="file_database.db"):
+    def __init__(self, db_path="file_database.db", lazy_init=False):
         self.db_path = db_path
-        self.init_database()
+        self.snapshot_path = os.path.splitext(db_path)[0] + ".snapshot.json"
+        self.initialized = False
+        self.content_index_available = False
+        self.init_lock = threading.Lock()
+        # Com lazy_init o banco só é aberto na primeira carga (fora da thread da interface)
+        if not lazy_init:
+            self.init_database()
         
     def init_database(self):
-        conn = sqlite3.connect(self.db_path)
+        """Aplicar as migrações pendentes de MIGRATIONS"""
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
         cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS files (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                original_name TEXT NOT NULL,
-                stored_name TEXT NOT NULL,
-                file_path TEXT NOT NULL,
-                file_size INTEGER,
-                file_type TEXT,
-                category TEXT,
-                tags TEXT,
-                description TEXT,
-                date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_accessed TIMESTAMP)''')
-        conn.commit()
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        # Em banco novo o modo de auto_vacuum precisa ser definido antes da primeira tabela
+        if cursor.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0:
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        try:
+            for number, (migration, transactional) in enumerate(MIGRATIONS[version:], start=version + 1):
+                if transactional:
+                    cursor.execute('BEGIN IMMEDIATE')
+                    try:
+                        migration(cursor)
+                        cursor.execute(f'PRAGMA user_version = {number}')
+                        cursor.execute('COMMIT')
+                    except Exception:
+                        cursor.execute('ROLLBACK')
+                        raise
+                else:
+                    migration(cursor)
+                    cursor.execute(f'PRAGMA user_version = {number}')
+            # A migração do índice de conteúdo é pulada em SQLite sem trigram e a
+            # versão avança mesmo assim; tentar de novo a cada abertura cria a
+            # tabela (vazia: o restante vai pela varredura) quando o SQLite permitir
+            migrate_content_index(cursor)
+            self.content_index_available = cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name = 'file_content'").fetchone()[0] > 0
+        finally:
+            conn.close()
+        self.initialized = True
+
+    def ensure_database(self):
+        # Pode ser chamado ao mesmo tempo pela carga da lista e pelo registro de acessos
+        with self.init_lock:
+            if not self.initialized:
+                self.init_database()
+    
+    def reload(self):
+        """Reaplicar as migrações depois que o arquivo do banco foi substituído (restauração)"""
+        with self.init_lock:
+            self.initialized = False
+            self.init_database()
+    
+    def add_files(self, files, category="Outros"):
+        """Adicionar vários arquivos numa única transação; retorna os ids na mesma ordem"""
+        self.ensure_database()
+        conn = sqlite3.connect(self.db_path)
+        file_ids = []
+        with conn:
+            for file_info in files:
+                now = datetime.now()
+                cursor = conn.execute('''
+                    INSERT INTO files 
+                    (original_name, stored_name, file_path, file_size, file_type, category, tags, description, date_added, last_accessed)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (file_info['original_name'], file_info['stored_name'], file_info['file_path'],
+                      file_info['file_size'], file_info['file_type'], category, "", "", now, now))
+                file_ids.append(cursor.lastrowid)
         conn.close()
+        return file_ids
     
-    def add_file(self, original_name, stored_name, file_path, file_size, file_type, category="Outros", tags="", description=""):
-        """Adicionar arquivo ao banco de dados"""
+    def get_file(self, file_id):
+        """Buscar todas as colunas de um arquivo pelo id"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO files 
-            (original_name, stored_name, file_path, file_size, file_type, category, tags, description, date_added, last_accessed)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (original_name, stored_name, file_path, file_size, file_type, category, tags, description, datetime.now(), datetime.now()))
-        file_id = cursor.lastrowid
-        conn.commit()
+        cursor.execute('SELECT * FROM files WHERE id = ?', (file_id,))
+        file_data = cursor.fetchone()
         conn.close()
-        return file_id
+        return file_data
     
-    def get_all_files(self):
+    def iter_files(self, search_term="", batch_size=LOAD_BATCH_SIZE, view="all"):
+        """Percorrer a listagem em lotes (colunas de LISTING_COLUMNS).
+
+        view "all" lista dos mais recentes para os mais antigos; "recent" e
+        "most_used" listam os arquivos já abertos usando os índices
+        idx_files_recent (parcial, só arquivos abertos) e idx_files_access_count. O termo de busca filtra qualquer visão.
+        """
+        query, params = self.listing_query(search_term, view)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield batch
+        finally:
+            conn.close()
+    
+    def listing_query(self, search_term="", view="all"):
+        """Consulta e parâmetros da listagem; usada por iter_files e pelo relatório de manutenção"""
+        search_filter = "(original_name LIKE ? OR category LIKE ? OR tags LIKE ? OR description LIKE ?)"
+        params = [f'%{search_term}%'] * 4 if search_term else []
+        usage_filter = f"AND {search_filter}" if search_term else ""
+        if view == "recent":
+            return f'''
+                SELECT {LISTING_COLUMNS} FROM files INDEXED BY idx_files_recent
+                WHERE access_count > 0 {usage_filter}
+                ORDER BY last_accessed DESC LIMIT ?''', params + [USAGE_VIEW_LIMIT]
+        if view == "most_used":
+            return f'''
+                SELECT {LISTING_COLUMNS} FROM files INDEXED BY idx_files_access_count
+                WHERE access_count > 0 {usage_filter}
+                ORDER BY access_count DESC, last_accessed DESC LIMIT ?''', params + [USAGE_VIEW_LIMIT]
+        if search_term:
+            return f'''
+                SELECT {LISTING_COLUMNS} FROM files
+                WHERE {search_filter}
+                ORDER BY date_added DESC''', params
+        return f'''
+                SELECT {LISTING_COLUMNS} FROM files ORDER BY date_added DESC''', params
+    
+    def load_snapshot(self):
+        """Ler o snapshot dos arquivos mais recentes gravado na última carga completa"""
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            return FileListCache()
+        cache = FileListCache()
+        # Snapshots de versões antigas (linhas completas) são ignorados
+        if all(isinstance(row, list) and len(row) == 6 for row in rows):
+            cache.append_rows(rows)
+        return cache
+    
+    def save_snapshot(self, files):
+        """Gravar as linhas compactas (id, nome, tamanho, tipo, categoria, timestamp)"""
+        # Gravar em arquivo temporário e substituir, para nunca deixar um snapshot pela metade
+        temp_path = self.snapshot_path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(files, f, default=str)
+            os.replace(temp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"Erro ao salvar snapshot: {e}")
+    
+    def record_accesses(self, accesses):
+        """Gravar acessos acumulados numa única transação.
+
+        accesses é um dicionário {file_id: (último acesso, quantidade de acessos)}.
+        """
+        self.ensure_database()
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany('''
+                UPDATE files SET last_accessed = ?, access_count = access_count + ? WHERE id = ?
+            ''', [(last_accessed, count, file_id) for file_id, (last_accessed, count) in accesses.items()])
+        conn.close()
+    
+    def get_duplicate_candidates(self):
+        """Arquivos físicos (file_path distintos) cujo tamanho se repete"""
+        self.ensure_database()
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT * FROM files ORDER BY date_added DESC''')
+        cursor.execute(DUPLICATE_CANDIDATES_QUERY)
         files = cursor.fetchall()
         conn.close()
         return files
     
-    def search_files(self, search_term):
+    def get_cached_hashes(self):
+        """Hashes já calculados: {file_path: (tamanho, mtime, hash parcial, hash completo)}"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT file_path, file_size, mtime, partial_hash, full_hash FROM file_hashes')
+        hashes = {row[0]: row[1:] for row in cursor.fetchall()}
+        conn.close()
+        return hashes
+    
+    def save_hashes(self, hashes):
+        """Gravar hashes calculados: {file_path: (tamanho, mtime, hash parcial, hash completo)}"""
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO file_hashes (file_path, file_size, mtime, partial_hash, full_hash)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(file_path,) + tuple(values) for file_path, values in hashes.items()])
+        conn.close()
+    
+    def relink_files(self, kept_path, duplicate_paths):
+        """Apontar os registros das cópias duplicadas para o arquivo mantido"""
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            for file_path in duplicate_paths:
+                conn.execute(RELINK_FILE_QUERY, (os.path.basename(kept_path), kept_path, file_path))
+                conn.execute('DELETE FROM file_hashes WHERE file_path = ?', (file_path,))
+        conn.close()
+    
+    def delete_files_by_path(self, file_paths):
+        """Excluir os registros de todos os arquivos armazenados nos caminhos indicados"""
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            for file_path in file_paths:
+                if self.content_index_available:
+                    conn.execute('DELETE FROM file_content WHERE rowid IN (SELECT id FROM files WHERE file_path = ?)',
+                                 (file_path,))
+                conn.execute('DELETE FROM files WHERE file_path = ?', (file_path,))
+                conn.execute('DELETE FROM file_hashes WHERE file_path = ?', (file_path,))
+        conn.close()
+    
+    def get_content_search_candidates(self):
+        """Arquivos de texto pesquisáveis: colunas de LISTING_COLUMNS e o caminho armazenado"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT * FROM files 
-            WHERE original_name LIKE ? OR category LIKE ? OR tags LIKE ? OR description LIKE ?
-            ORDER BY date_added DESC
-        ''', (f'%{search_term}%', f'%{search_term}%', f'%{search_term}%', f'%{search_term}%'))
+        conditions = " OR ".join("lower(stored_name) LIKE ?" for _ in CONTENT_SEARCH_EXTENSIONS)
+        cursor.execute(f'''
+            SELECT {LISTING_COLUMNS}, file_path FROM files
+            WHERE {conditions}
+            ORDER BY date_added DESC''', [f'%{ext}' for ext in CONTENT_SEARCH_EXTENSIONS])
         files = cursor.fetchall()
         conn.close()
         return files
     
-    def update_file_access(self, file_id):
+    def get_indexed_content_ids(self):
+        if not self.content_index_available:
+            return set()
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE files SET last_accessed = ? WHERE id = ?
-        ''', (datetime.now(), file_id))
-        conn.commit()
+        cursor.execute('SELECT rowid FROM file_content')
+        ids = {row[0] for row in cursor.fetchall()}
+        conn.close()
+        return ids
+    
+    def search_content_index(self, search_term):
+        """Ids dos arquivos indexados cujo texto contém o termo (sem diferenciar maiúsculas)"""
+        escaped = search_term.casefold().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT rowid FROM file_content WHERE body LIKE ? ESCAPE '\\'", (f'%{escaped}%',))
+        ids = {row[0] for row in cursor.fetchall()}
+        conn.close()
+        return ids
+    
+    def index_file_contents(self, files, checkpoint=None):
+        """Indexar o texto dos arquivos pesquisáveis; files é uma lista de (file_id, file_path).
+        
+        Grava em lotes de até CONTENT_INDEX_BATCH_BYTES de texto lido. Antes de cada
+        lote chama checkpoint(lidos, total), se informado; se ele devolver False a
+        indexação para e os arquivos restantes ficam para a pesquisa por varredura.
+        """
+        self.ensure_database()
+        if not self.content_index_available:
+            return
+        files = [(file_id, file_path) for file_id, file_path in files
+                 if file_path.lower().endswith(CONTENT_SEARCH_EXTENSIONS)]
+        if not files:
+            return
+        conn = sqlite3.connect(self.db_path)
+        try:
+            contents = []
+            batch_bytes = 0
+            for i, (file_id, file_path) in enumerate(files):
+                if batch_bytes >= CONTENT_INDEX_BATCH_BYTES:
+                    if not self.write_content_batch(conn, contents, checkpoint, i, len(files)):
+                        return
+                    contents = []
+                    batch_bytes = 0
+                try:
+                    # Arquivos muito grandes continuam sendo pesquisados por varredura
+                    if os.path.getsize(file_path) > CONTENT_INDEX_MAX_BYTES:
+                        continue
+                    with open(file_path, "rb") as f:
+                        data = f.read()
+                except OSError:
+                    continue
+                # Guardado em casefold: o LIKE do trigram só ignora maiúsculas em ASCII
+                contents.append((file_id, decode_text(data).casefold()))
+                batch_bytes += len(data)
+            self.write_content_batch(conn, contents, checkpoint, len(files), len(files))
+        finally:
+            conn.close()
+    
+    def write_content_batch(self, conn, contents, checkpoint, indexed, total):
+        """Gravar um lote do índice de conteúdo; False se o checkpoint pediu para parar"""
+        if checkpoint is not None and not checkpoint(indexed, total):
+            return False
+        if contents:
+            with conn:
+                conn.executemany('DELETE FROM file_content WHERE rowid = ?',
+                                 [(file_id,) for file_id, _ in contents])
+                conn.executemany('INSERT INTO file_content (rowid, body) VALUES (?, ?)', contents)
+        return True
+    
+    def statistics_stale(self, cursor):
+        """Estatísticas ausentes ou calculadas quando a tabela tinha outro tamanho"""
+        if not cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()[0]:
+            return True
+        # O primeiro número de stat é a quantidade de linhas no último ANALYZE
+        analyzed = {}
+        for table, stat in cursor.execute('SELECT tbl, stat FROM sqlite_stat1').fetchall():
+            analyzed[table] = max(analyzed.get(table, 0), int(stat.split()[0]))
+        for table in MAINTENANCE_STATS_TABLES:
+            rows = cursor.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            if table not in analyzed:
+                if rows:
+                    return True
+            elif abs(rows - analyzed[table]) > analyzed[table] * MAINTENANCE_STATS_STALE_RATIO:
+                return True
+        return False
+    
+    def analyze_if_stale(self, cursor):
+        """ANALYZE limitado a MAINTENANCE_ANALYSIS_LIMIT linhas por índice quando necessário.
+
+        PRAGMA optimize numa conexão nova não tem consultas anteriores em que
+        se basear e não analisa nada, por isso a verificação é feita aqui.
+        """
+        if not self.statistics_stale(cursor):
+            return False
+        cursor.execute(f'PRAGMA analysis_limit = {MAINTENANCE_ANALYSIS_LIMIT}')
+        cursor.execute('ANALYZE')
+        return True
+    
+    def run_maintenance(self, full=False):
+        """Devolver páginas livres ao sistema e atualizar as estatísticas do planejador.
+
+        Na manutenção periódica o incremental_vacuum é limitado a
+        MAINTENANCE_VACUUM_PAGES páginas e as estatísticas só são refeitas,
+        com ANALYZE limitado, quando estão ausentes ou desatualizadas; com
+        full=True todas as páginas livres são liberadas e o ANALYZE é completo.
+        """
+        self.ensure_database()
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        cursor = conn.cursor()
+        free_pages = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+        # incremental_vacuum libera uma página por passo; executescript roda até o fim
+        if full:
+            conn.executescript('PRAGMA incremental_vacuum;')
+            cursor.execute('ANALYZE')
+        else:
+            if free_pages >= MAINTENANCE_VACUUM_MIN_PAGES:
+                conn.executescript(f'PRAGMA incremental_vacuum({MAINTENANCE_VACUUM_PAGES});')
+            self.analyze_if_stale(cursor)
+        released = free_pages - cursor.execute('PRAGMA freelist_count').fetchone()[0]
+        conn.close()
+        return released
+    
+    def optimize(self):
+        """Atualizar as estatísticas desatualizadas ao fechar o programa"""
+        if not self.initialized:
+            return
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        self.analyze_if_stale(conn.cursor())
+        conn.close()
+    
+    def maintenance_report(self):
+        """Tamanho, fragmentação e uso dos índices do banco de dados"""
+        self.ensure_database()
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        page_size = cursor.execute('PRAGMA page_size').fetchone()[0]
+        page_count = cursor.execute('PRAGMA page_count').fetchone()[0]
+        free_pages = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+        report = {
+            'file_size': sum(os.path.getsize(path) for path in (self.db_path, self.db_path + "-wal")
+                             if os.path.exists(path)),
+            'schema_version': cursor.execute('PRAGMA user_version').fetchone()[0],
+            'auto_vacuum': {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}.get(
+                cursor.execute('PRAGMA auto_vacuum').fetchone()[0], "?"),
+            'page_size': page_size,
+            'page_count': page_count,
+            'free_pages': free_pages,
+            'fragmentation': free_pages / page_count * 100 if page_count else 0.0,
+            'analyzed': cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()[0] > 0,
+            'objects': [],
+            'query_plans': []}
+        # Espaço ocupado e não utilizado por tabela/índice (dbstat pode não estar disponível)
+        try:
+            cursor.execute('''
+                SELECT name, COUNT(*), SUM(pgsize), SUM(unused) FROM dbstat
+                GROUP BY name ORDER BY SUM(pgsize) DESC''')
+            report['objects'] = cursor.fetchall()
+        except sqlite3.OperationalError:
+            pass
+        # Índice usado por cada consulta principal do programa, com o mesmo SQL que ela executa
+        queries = [
+            ("Listagem",) + self.listing_query(),
+            ("Listagem com pesquisa",) + self.listing_query("a"),
+            ("Usados recentemente",) + self.listing_query(view="recent"),
+            ("Usados recentemente com pesquisa",) + self.listing_query("a", "recent"),
+            ("Mais usados",) + self.listing_query(view="most_used"),
+            ("Mais usados com pesquisa",) + self.listing_query("a", "most_used"),
+            ("Detalhes do arquivo", "SELECT * FROM files WHERE id = ?", (0,)),
+            ("Candidatos a duplicata", DUPLICATE_CANDIDATES_QUERY, ()),
+            ("Religar duplicata", RELINK_FILE_QUERY, ("", "", ""))]
+        for label, query, params in queries:
+            plan = cursor.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+            report['query_plans'].append((label, [row[-1] for row in plan]))
         conn.close()
+        return report
     
     def delete_file(self, file_id):
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        if self.content_index_available:
+            cursor.execute('DELETE FROM file_content WHERE rowid = ?', (file_id,))
         cursor.execute('DELETE FROM files WHERE id = ?', (file_id,))
         conn.commit()
         conn.close()
 
 
-class FileOrganizerThread(QThread):
+class FileListCache:
+    """Listagem carregada em colunas compactas.
+
+    Ids, tamanhos e datas (timestamp) ficam em arrays; tipos e categorias,
+    que se repetem muito, são internados para que cada texto exista uma vez só.
+    """
+    def __init__(self):
+        self.ids = array('q')
+        self.sizes = array('q')
+        self.dates = array('d')
+        self.names = []
+        self.types = []
+        self.categories = []
+        self._strings = {}
+        
+    def __len__(self):
+        return len(self.ids)
+    
+    def _intern(self, value):
+        if value is None:
+            return None
+        return self._strings.setdefault(value, value)
+    
+    def _timestamp(self, value):
+        # Datas vêm do SQLite como texto; 0 indica data ausente ou inválida
+        if isinstance(value, (int, float)):
+            return float(value)
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except (TypeError, ValueError):
+            return 0.0
+        
+    def append_rows(self, rows):
+        """Adicionar linhas (id, nome, tamanho, tipo, categoria, data_adição)"""
+        for file_id, name, size, file_type, category, date_added in rows:
+            self.ids.append(file_id)
+            self.sizes.append(size or 0)
+            self.dates.append(self._timestamp(date_added))
+            self.names.append(name)
+            self.types.append(self._intern(file_type))
+            self.categories.append(self._intern(category))
+            
+    def extend(self, other):
+        for i in range(len(other)):
+            self.ids.append(other.ids[i])
+            self.sizes.append(other.sizes[i])
+            self.dates.append(other.dates[i])
+            self.names.append(other.names[i])
+            self.types.append(self._intern(other.types[i]))
+            self.categories.append(self._intern(other.categories[i]))
+    
+    def date(self, index):
+        timestamp = self.dates[index]
+        return datetime.fromtimestamp(timestamp) if timestamp else None
+    
+    def row(self, index):
+        return (self.ids[index], self.names[index], self.sizes[index],
+                self.types[index], self.categories[index], self.dates[index])
+    
+    def rows(self, start=0, stop=None):
+        stop = len(self) if stop is None else min(stop, len(self))
+        return [self.row(i) for i in range(start, stop)]
+
+    def sort(self, column, descending=False):
+        """Reordenar as linhas por uma coluna ("ids", "names", "sizes", "types", "categories" ou "dates")"""
+        values = getattr(self, column)
+        if isinstance(values, list):
+            # Tipo e categoria podem ser nulos
+            order = sorted(range(len(self)), key=lambda i: values[i] or "", reverse=descending)
+        else:
+            order = sorted(range(len(self)), key=values.__getitem__, reverse=descending)
+        self.ids = array('q', (self.ids[i] for i in order))
+        self.sizes = array('q', (self.sizes[i] for i in order))
+        self.dates = array('d', (self.dates[i] for i in order))
+        self.names = [self.names[i] for i in order]
+        self.types = [self.types[i] for i in order]
+        self.categories = [self.categories[i] for i in order]
+
+    def clear(self):
+        self.__init__()
+
+
+class FileListModel(QtCore.QAbstractTableModel):
+    """Modelo da lista de arquivos sobre uma FileListCache.
+
+    O texto de cada célula é formatado em data() apenas quando a linha é
+    desenhada; nenhum item ou texto formatado fica guardado por arquivo.
+    Sem arquivos, a lista mostra uma única linha com a mensagem informada.
+    order guarda a ordem (coluna, Qt.SortOrder) em que as linhas estão, para
+    não reordenar o que já chegou ordenado do banco.
+    """
+    HEADERS = ["ID", "Nome do Arquivo", "Tamanho", "Tipo", "Categoria", "Data de Adição", "Ações"]
+    # Coluna da FileListCache usada para ordenar cada coluna exibida
+    SORT_COLUMNS = ["ids", "names", "sizes", "types", "categories", "dates", None]
+    # Ordem da listagem do banco (ORDER BY date_added DESC)
+    DATE_ADDED_ORDER = (5, QtCore.Qt.DescendingOrder)
+
+    def __init__(self, format_file_size, format_date, parent=None):
+        super().__init__(parent)
+        self.files = FileListCache()
+        self.message = ""
+        self.order = None
+        self.format_file_size = format_file_size
+        self.format_date = format_date
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.files) or (1 if self.message else 0)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if not self.files:
+            return self.message if role == QtCore.Qt.DisplayRole and column == 1 else None
+        if role == QtCore.Qt.UserRole:
+            return self.files.ids[row]
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if column == 0:
+            return str(self.files.ids[row])
+        if column == 1:
+            return self.files.names[row]
+        if column == 2:
+            return self.format_file_size(self.files.sizes[row])
+        if column == 3:
+            return self.files.types[row]
+        if column == 4:
+            return self.files.categories[row]
+        if column == 5:
+            date_added = self.files.date(row)
+            return self.format_date(date_added) if date_added else ""
+        return "📥 Download"
+
+    def file_id(self, index):
+        """Id do arquivo da linha, ou None na linha de mensagem"""
+        return self.data(index, QtCore.Qt.UserRole) if index.isValid() else None
+
+    def set_files(self, files, message="", order=None):
+        """Substituir a listagem (a FileListCache passa a pertencer ao modelo)"""
+        self.beginResetModel()
+        self.files = files
+        self.message = message
+        self.order = order
+        self.endResetModel()
+
+    def append_files(self, files):
+        if not files:
+            return
+        if not self.files:
+            # A linha de mensagem dá lugar aos arquivos
+            self.beginResetModel()
+            self.files.extend(files)
+            self.endResetModel()
+            return
+        first = len(self.files)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(files) - 1)
+        self.files.extend(files)
+        self.endInsertRows()
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        if column < 0 or self.SORT_COLUMNS[column] is None or (column, order) == self.order:
+            return
+        if len(self.files) > 1:
+            self.beginResetModel()
+            self.files.sort(self.SORT_COLUMNS[column], order == QtCore.Qt.DescendingOrder)
+            self.endResetModel()
+        self.order = (column, order)
+
+
+class AccessTrackerThread(QThread):
+    """Acumula os acessos aos arquivos em memória e grava em lotes.
+
+    Os acessos são gravados a cada ACCESS_FLUSH_INTERVAL segundos e ao parar
+    a thread, evitando um commit por arquivo aberto.
+    """
+    def __init__(self, db_manager, interval=ACCESS_FLUSH_INTERVAL):
+        super().__init__()
+        self.db_manager = db_manager
+        self.interval = interval
+        self.is_running = True
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.wake_event = threading.Event()
+        
+    def record(self, file_id):
+        """Registrar um acesso; pode ser chamado de qualquer thread"""
+        with self.lock:
+            _, count = self.pending.get(file_id, (None, 0))
+            self.pending[file_id] = (datetime.now(), count + 1)
+            
+    def flush(self):
+        with self.lock:
+            accesses, self.pending = self.pending, {}
+        if not accesses:
+            return
+        try:
+            self.db_manager.record_accesses(accesses)
+        except Exception as e:
+            print(f"Erro ao gravar acessos: {e}")
+            # Devolver ao buffer para tentar de novo na próxima gravação
+            with self.lock:
+                for file_id, (last_accessed, count) in accesses.items():
+                    newer_access, newer_count = self.pending.get(file_id, (last_accessed, 0))
+                    self.pending[file_id] = (max(last_accessed, newer_access), count + newer_count)
+                
+    def run(self):
+        while self.is_running:
+            self.wake_event.wait(self.interval)
+            self.wake_event.clear()
+            self.flush()
+        # Gravar o que ainda estiver pendente ao encerrar
+        self.flush()
+        
+    def stop(self):
+        self.is_running = False
+        self.wake_event.set()
+
+
+class Job(QtCore.QObject):
+    """Tarefa longa executada pelo JobScheduler.
+
+    As subclasses implementam run(), chamam checkpoint() entre as etapas (que
+    segura a tarefa enquanto pausada e retorna False quando cancelada),
+    informam a vazão com add_bytes()/add_items() e terminam com finish().
+    Tarefas silenciosas (silent) não abrem o painel de tarefas e saem dele
+    ao terminar sem erro.
+    """
     progress_updated = pyqtSignal(int)
     status_updated = pyqtSignal(str)
-    finished_signal = pyqtSignal(bool, list)
+    finished_signal = pyqtSignal(bool, object)
+    kind = JOB_READER
+    silent = False
     
-    def __init__(self, source_folder, storage_folder, category="Outros", file_extensions=None):
+    def __init__(self, title):
         super().__init__()
+        self.title = title
+        self.state = JOB_QUEUED
+        self.priority = JOB_PRIORITY_NORMAL
+        self.is_running = True
+        self.succeeded = None
+        self.bytes_done = 0
+        self.items_done = 0
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+        
+    def checkpoint(self):
+        self.resume_event.wait()
+        return self.is_running
+    
+    def add_bytes(self, nbytes):
+        self.bytes_done += nbytes
+        
+    def add_items(self, count=1):
+        self.items_done += count
+        
+    def finish(self, success, result):
+        self.succeeded = success
+        self.finished_signal.emit(success, result)
+        
+    def run(self):
+        """Trabalho da tarefa, executado numa thread do pool; abstrato.
+        
+        Cada subclasse implementa, chamando checkpoint() entre as etapas e
+        terminando com finish().
+        """
+        raise NotImplementedError
+    
+    def pause(self):
+        self.resume_event.clear()
+        
+    def resume(self):
+        self.resume_event.set()
+        
+    def stop(self):
+        self.is_running = False
+        self.resume_event.set()
+
+
+class JobScheduler(QtCore.QObject):
+    """Executa as tarefas longas em segundo plano com limites por tipo de E/S.
+
+    Tarefas que gravam no banco/armazenamento (JOB_WRITER) rodam uma de cada
+    vez; tarefas de leitura (JOB_READER) rodam em paralelo até o limite. A fila
+    é ordenada por prioridade e, dentro dela, por ordem de chegada. Todo o
+    controle da fila acontece na thread da interface.
+    """
+    job_added = pyqtSignal(object)
+    job_changed = pyqtSignal(object)
+    job_ended = pyqtSignal(object)
+    
+    def __init__(self, max_readers=JOB_MAX_READERS, max_writers=JOB_MAX_WRITERS, parent=None):
+        super().__init__(parent)
+        self.limits = {JOB_READER: max_readers, JOB_WRITER: max_writers}
+        self.running = {JOB_READER: 0, JOB_WRITER: 0}
+        # Tarefas entregues ao pool, em execução ou pausadas durante a execução
+        self.active = set()
+        self.queue = []
+        self.counter = 0
+        self.executor = None
+        self.job_ended.connect(self.release)
+        
+    def submit(self, job, priority=JOB_PRIORITY_NORMAL):
+        job.priority = priority
+        self.counter += 1
+        heapq.heappush(self.queue, (-priority, self.counter, job))
+        self.job_added.emit(job)
+        self.dispatch()
+        
+    def dispatch(self):
+        if self.executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.executor = ThreadPoolExecutor(max_workers=sum(self.limits.values()))
+        waiting = []
+        while self.queue:
+            entry = heapq.heappop(self.queue)
+            job = entry[2]
+            if job.state == JOB_CANCELLED:
+                continue
+            # Tarefas pausadas na fila e tipos sem vaga esperam a próxima rodada
+            if job.state == JOB_PAUSED or self.running[job.kind] >= self.limits[job.kind]:
+                waiting.append(entry)
+                continue
+            self.running[job.kind] += 1
+            self.active.add(job)
+            job.state = JOB_RUNNING
+            self.executor.submit(self.execute, job)
+            self.job_changed.emit(job)
+        for entry in waiting:
+            heapq.heappush(self.queue, entry)
+            
+    def execute(self, job):
+        # Executado numa thread do pool
+        try:
+            job.run()
+        except Exception as e:
+            job.finish(False, f"Erro inesperado: {str(e)}")
+        finally:
+            if job.succeeded is None:
+                job.finish(False, "Tarefa encerrada sem resultado.")
+            self.job_ended.emit(job)
+            
+    def release(self, job):
+        self.running[job.kind] -= 1
+        self.active.discard(job)
+        if job.succeeded:
+            job.state = JOB_DONE
+        elif not job.is_running:
+            job.state = JOB_CANCELLED
+        else:
+            job.state = JOB_FAILED
+        self.job_changed.emit(job)
+        self.dispatch()
+        
+    def pause(self, job):
+        if job.state in (JOB_QUEUED, JOB_RUNNING):
+            job.pause()
+            job.state = JOB_PAUSED
+            self.job_changed.emit(job)
+            
+    def resume(self, job):
+        if job.state == JOB_PAUSED:
+            job.resume()
+            # Tarefa que estava pausada ainda na fila volta a esperar vaga
+            job.state = JOB_QUEUED if any(entry[2] is job for entry in self.queue) else JOB_RUNNING
+            self.job_changed.emit(job)
+            self.dispatch()
+            
+    def has_pending(self, job_type):
+        """Se há tarefa do tipo indicado na fila ou em execução"""
+        return (any(isinstance(job, job_type) for job in self.active) or
+                any(isinstance(job, job_type) and job.state != JOB_CANCELLED for _, _, job in self.queue))
+        
+    def cancel(self, job):
+        queued = any(entry[2] is job for entry in self.queue)
+        job.stop()
+        if queued:
+            job.state = JOB_CANCELLED
+            job.finish(False, "Tarefa cancelada antes de iniciar.")
+            self.job_changed.emit(job)
+            
+    def shutdown(self):
+        """Cancelar todas as tarefas e esperar as que estão em execução pararem"""
+        for _, _, job in list(self.queue):
+            if job.state in (JOB_QUEUED, JOB_PAUSED):
+                self.cancel(job)
+        self.queue = []
+        # Em execução ou pausadas: stop() libera a pausa e a tarefa para no próximo checkpoint
+        for job in list(self.active):
+            job.stop()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+
+class FileOrganizerJob(Job):
+    kind = JOB_WRITER
+    
+    def __init__(self, db_manager, source_folder, storage_folder, category="Outros", file_extensions=None):
+        super().__init__(f"Importar {os.path.basename(source_folder) or source_folder}")
+        self.db_manager = db_manager
         self.source_folder = source_folder
         self.storage_folder = storage_folder
         self.category = category
         self.file_extensions = file_extensions if file_extensions else ["*"]  # Todos os arquivos
-        self.is_running = True
         
     def run(self):
         try:
@@ -138,7 +988,7 @@ class FileOrganizerThread(QThread):
             
             if not os.path.exists(self.source_folder):
                 self.status_updated.emit("Erro: Pasta de origem não encontrada!")
-                self.finished_signal.emit(False, [])
+                self.finish(False, [])
                 return
                 
             # Criar pasta de armazenamento se não existir
@@ -161,13 +1011,13 @@ class FileOrganizerThread(QThread):
             
             if total_files == 0:
                 self.status_updated.emit("Nenhum arquivo encontrado!")
-                self.finished_signal.emit(True, [])
+                self.finish(True, [])
                 return
             
             # Processar arquivos
             processed_files = []
             for i, file_path in enumerate(files):
-                if not self.is_running:
+                if not self.checkpoint():
                     break
                     
                 try:
@@ -186,6 +1036,8 @@ class FileOrganizerThread(QThread):
                     
                     # Copiar arquivo para pasta interna
                     shutil.copy2(file_path, stored_path)
+                    self.add_bytes(file_size)
+                    self.add_items()
                     
                     processed_files.append({
                         'original_name': original_name,
@@ -200,14 +1052,30 @@ class FileOrganizerThread(QThread):
                 except Exception as e:
                     self.status_updated.emit(f"Erro ao processar {original_name}: {str(e)}")
             if self.is_running:
-                self.status_updated.emit(f"Concluído! {len(processed_files)} arquivos processados.")
-                self.finished_signal.emit(True, processed_files)
+                # Salvar no banco de dados numa única transação
+                file_ids = self.db_manager.add_files(processed_files, self.category)
+                # Indexar o texto dos arquivos pesquisáveis para a pesquisa de conteúdo;
+                # a importação já está salva, então cancelar aqui só interrompe o índice
+                self.db_manager.index_file_contents(
+                    [(file_id, file_info['file_path']) for file_id, file_info in zip(file_ids, processed_files)],
+                    self.index_checkpoint)
+                if self.is_running:
+                    self.status_updated.emit(f"Concluído! {len(processed_files)} arquivos processados.")
+                else:
+                    self.status_updated.emit(
+                        f"{len(processed_files)} arquivos importados; indexação do conteúdo cancelada.")
+                self.finish(True, processed_files)
             else:
                 self.status_updated.emit("Operação cancelada pelo usuário.")
-                self.finished_signal.emit(False, [])
+                self.finish(False, [])
         except Exception as e:
             self.status_updated.emit(f"Erro crítico: {str(e)}")
-            self.finished_signal.emit(False, [])
+            self.finish(False, [])
+    
+    def index_checkpoint(self, indexed, total):
+        """Progresso e cancelamento entre os lotes da indexação de conteúdo"""
+        self.status_updated.emit(f"Indexando conteúdo: {indexed}/{total} arquivos")
+        return self.checkpoint()
     
     def get_file_type(self, file_ext):
         """Determinar o tipo de arquivo baseado na extensão"""
@@ -236,60 +1104,939 @@ class FileOrganizerThread(QThread):
             '.dwg': 'Desenho CAD',
             '.dxf': 'Desenho CAD',}
         return file_types.get(file_ext.lower(), 'Arquivo')
-    def stop(self):
-        self.is_running = False
 
 class FileSearchThread(QThread):
-    search_finished = pyqtSignal(list)
+    batch_loaded = pyqtSignal(object, bool)
+    search_finished = pyqtSignal(int)
     
-    def __init__(self, db_manager, search_term=""):
+    def __init__(self, db_manager, search_term="", view="all", access_tracker=None):
         super().__init__()
         self.db_manager = db_manager
         self.search_term = search_term
+        self.view = view
+        self.access_tracker = access_tracker
         self.is_running = True
         
     def run(self):
+        total = 0
+        snapshot = []
+        save_snapshot = self.view == "all" and not self.search_term
         try:
-            if self.search_term:
-                files = self.db_manager.search_files(self.search_term)
-            else:
-                files = self.db_manager.get_all_files()
-            if self.is_running:
-                self.search_finished.emit(files)
+            self.db_manager.ensure_database()
+            # Visões de uso precisam dos acessos que ainda estão só em memória
+            if self.view != "all" and self.access_tracker:
+                self.access_tracker.flush()
+            # Enviar os resultados em lotes para a interface ir preenchendo a lista
+            for rows in self.db_manager.iter_files(self.search_term, view=self.view):
+                if not self.is_running:
+                    return
+                batch = FileListCache()
+                batch.append_rows(rows)
+                self.batch_loaded.emit(batch, total == 0)
+                if save_snapshot and len(snapshot) < STARTUP_SNAPSHOT_ROWS:
+                    snapshot.extend(batch.rows(0, STARTUP_SNAPSHOT_ROWS - len(snapshot)))
+                total += len(batch)
+            # Atualizar o snapshot usado na próxima abertura do programa
+            if save_snapshot:
+                self.db_manager.save_snapshot(snapshot)
         except Exception as e:
             print(f"Erro na busca: {e}")
-            self.search_finished.emit([])
+        if self.is_running:
+            self.search_finished.emit(total)
     
     def stop(self):
         self.is_running = False
 
-class DownloadThread(QThread):
-    download_finished = pyqtSignal(bool, str)
-    progress_updated = pyqtSignal(int)
+class MaintenanceJob(Job):
+    """Manutenção do banco: incremental_vacuum e estatísticas do planejador.
 
+    A execução periódica é leve; a iniciada pelo usuário (full=True) libera
+    todas as páginas livres, roda ANALYZE e devolve o relatório de antes e depois.
+    """
+    kind = JOB_WRITER
+    
+    def __init__(self, db_manager, full=False):
+        super().__init__("Manutenção do banco de dados" if full else "Manutenção periódica")
+        self.db_manager = db_manager
+        self.full = full
+        # A periódica roda sem interromper o usuário
+        self.silent = not full
+        
+    def run(self):
+        try:
+            before = self.db_manager.maintenance_report() if self.full else None
+            self.progress_updated.emit(30)
+            self.status_updated.emit("Liberando páginas livres e atualizando estatísticas...")
+            released = self.db_manager.run_maintenance(self.full)
+            self.add_items(released)
+            self.progress_updated.emit(80)
+            after = self.db_manager.maintenance_report() if self.full else None
+            self.progress_updated.emit(100)
+            self.status_updated.emit(f"Concluído! {released} páginas liberadas.")
+            self.finish(True, (before, after, released))
+        except Exception as e:
+            self.status_updated.emit(f"Erro na manutenção: {str(e)}")
+            self.finish(False, f"Erro na manutenção: {str(e)}")
+
+
+class DownloadJob(Job):
     def __init__(self, source_path, destination_path):
-        super().__init__()
+        super().__init__(f"Download {os.path.basename(destination_path)}")
         self.source_path = source_path
         self.destination_path = destination_path
         
     def run(self):
         try:
-            self.progress_updated.emit(10)
-            
             if not os.path.exists(self.source_path):
-                self.download_finished.emit(False, "Arquivo não encontrado no banco de dados")
+                self.finish(False, "Arquivo não encontrado no banco de dados")
                 return
             
             # Criar diretório de destino se não existir
             os.makedirs(os.path.dirname(self.destination_path), exist_ok=True)
-            self.progress_updated.emit(50)
             
-            # Copiar arquivo
-            shutil.copy2(self.source_path, self.destination_path)
+            # Copiar arquivo em blocos, permitindo pausar e cancelar
+            total_bytes = os.path.getsize(self.source_path) or 1
+            copied_bytes = 0
+            with open(self.source_path, "rb") as source_file, open(self.destination_path, "wb") as destination_file:
+                while self.checkpoint():
+                    chunk = source_file.read(BACKUP_COPY_CHUNK)
+                    if not chunk:
+                        break
+                    destination_file.write(chunk)
+                    copied_bytes += len(chunk)
+                    self.add_bytes(len(chunk))
+                    self.progress_updated.emit(int(copied_bytes / total_bytes * 100))
+            if not self.is_running:
+                os.remove(self.destination_path)
+                self.finish(False, "Download cancelado pelo usuário.")
+                return
+            shutil.copystat(self.source_path, self.destination_path)
             self.progress_updated.emit(100)
-            self.download_finished.emit(True, f"Arquivo baixado com sucesso para: {self.destination_path}")
+            self.finish(True, f"Arquivo baixado com sucesso para: {self.destination_path}")
         except Exception as e:
-            self.download_finished.emit(False, f"Erro ao baixar arquivo: {str(e)}")
+            self.finish(False, f"Erro ao baixar arquivo: {str(e)}")
+
+
+class Throttle:
+    """Limita a taxa de cópia em bytes por segundo (0 = sem limite)"""
+    def __init__(self, max_bytes_per_second=0, on_consume=None):
+        self.max_bytes_per_second = max_bytes_per_second
+        self.on_consume = on_consume
+        self.started = time.monotonic()
+        self.transferred = 0
+        
+    def consume(self, nbytes):
+        self.transferred += nbytes
+        if self.on_consume:
+            self.on_consume(nbytes)
+        if self.max_bytes_per_second:
+            expected = self.transferred / self.max_bytes_per_second
+            elapsed = time.monotonic() - self.started
+            if expected > elapsed:
+                time.sleep(expected - elapsed)
+
+
+class ThrottledReader:
+    """Arquivo de leitura que passa cada bloco lido pelo Throttle"""
+    def __init__(self, file_obj, throttle):
+        self.file_obj = file_obj
+        self.throttle = throttle
+        
+    def read(self, size=-1):
+        data = self.file_obj.read(size if size and size > 0 else BACKUP_COPY_CHUNK)
+        self.throttle.consume(len(data))
+        return data
+
+
+def copy_stream(source, destination, throttle):
+    while True:
+        chunk = source.read(BACKUP_COPY_CHUNK)
+        if not chunk:
+            break
+        throttle.consume(len(chunk))
+        destination.write(chunk)
+
+
+def load_backup_index(backup_folder):
+    """Lista de snapshots da pasta de backup, do mais antigo para o mais recente"""
+    try:
+        with open(os.path.join(backup_folder, BACKUP_INDEX_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def read_backup_manifest(backup_folder, entry):
+    if entry["archive"]:
+        import tarfile
+        with tarfile.open(os.path.join(backup_folder, entry["name"] + ".tar"), "r") as tar:
+            return json.load(tar.extractfile("manifest.json"))
+    with open(os.path.join(backup_folder, entry["name"], "manifest.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class BackupJob(Job):
+    """Backup com o programa em uso.
+
+    O banco é copiado pela API de backup do SQLite numa única etapa (snapshot
+    consistente mesmo com gravações em andamento; em etapas menores a cópia
+    recomeçaria do início a cada gravação feita por outra conexão), então o
+    limite de velocidade vale só para os arquivos armazenados. Deles, só são
+    copiados os adicionados depois do último backup (date_added) ou ausentes
+    do manifesto anterior; o manifesto de cada snapshot indica em qual
+    snapshot está cada arquivo, permitindo restaurar qualquer um deles.
+    """
+    def __init__(self, db_path, backup_folder, as_archive=False, max_bytes_per_second=0):
+        super().__init__(f"Backup em {backup_folder}")
+        self.db_path = db_path
+        self.backup_folder = backup_folder
+        self.as_archive = as_archive
+        self.throttle = Throttle(max_bytes_per_second, self.add_bytes)
+        
+    def run(self):
+        import tarfile
+        os.makedirs(self.backup_folder, exist_ok=True)
+        index = load_backup_index(self.backup_folder)
+        name = "backup_" + datetime.now().strftime("%Y%m%d_%H%M%S")
+        existing = {entry["name"] for entry in index}
+        suffix = 1
+        while name in existing or os.path.exists(os.path.join(self.backup_folder, name)):
+            name = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{suffix}"
+            suffix += 1
+        target = os.path.join(self.backup_folder, name + (".tar" if self.as_archive else ""))
+        partial = target + ".partial"
+        db_copy = os.path.join(self.backup_folder, name + ".db.partial")
+        tar = None
+        try:
+            previous = read_backup_manifest(self.backup_folder, index[-1]) if index else None
+            
+            # Snapshot consistente do banco de dados
+            self.status_updated.emit("Copiando banco de dados...")
+            source = sqlite3.connect(self.db_path)
+            destination = sqlite3.connect(db_copy)
+            source.backup(destination)
+            source.close()
+            self.add_bytes(os.path.getsize(db_copy))
+            self.progress_updated.emit(10)
+            rows = destination.execute('SELECT stored_name, file_path, file_size, date_added FROM files').fetchall()
+            destination.close()
+            
+            # Escolher os arquivos novos desde o último backup
+            previous_files = previous["files"] if previous else {}
+            since = previous["last_date_added"] if previous else None
+            files = {}
+            to_copy = []
+            for stored_name, file_path, file_size, date_added in rows:
+                is_new = since is None or (date_added is not None and str(date_added) > since)
+                if stored_name in previous_files and not is_new:
+                    files[stored_name] = previous_files[stored_name]
+                else:
+                    to_copy.append((stored_name, file_path, file_size or 0))
+            dates = [str(row[3]) for row in rows if row[3] is not None] + ([since] if since else [])
+            last_date_added = max(dates, default=None)
+            
+            if self.as_archive:
+                tar = tarfile.open(partial, "w")
+                tar.add(db_copy, arcname="file_database.db")
+            else:
+                os.makedirs(os.path.join(partial, "arquivos"))
+                shutil.move(db_copy, os.path.join(partial, "file_database.db"))
+            
+            total_bytes = sum(size for _, _, size in to_copy) or 1
+            copied_bytes = 0
+            for stored_name, file_path, file_size in to_copy:
+                if not self.checkpoint():
+                    break
+                if not os.path.exists(file_path):
+                    self.status_updated.emit(f"Arquivo ausente, ignorado: {stored_name}")
+                    continue
+                self.status_updated.emit(f"Copiando: {stored_name}")
+                with open(file_path, "rb") as source_file:
+                    if tar is not None:
+                        info = tar.gettarinfo(file_path, arcname="arquivos/" + stored_name)
+                        tar.addfile(info, ThrottledReader(source_file, self.throttle))
+                    else:
+                        with open(os.path.join(partial, "arquivos", stored_name), "wb") as destination_file:
+                            copy_stream(source_file, destination_file, self.throttle)
+                        shutil.copystat(file_path, os.path.join(partial, "arquivos", stored_name))
+                files[stored_name] = name
+                copied_bytes += file_size
+                self.add_items()
+                self.progress_updated.emit(10 + int(copied_bytes / total_bytes * 90))
+                
+            if not self.is_running:
+                raise InterruptedError("Backup cancelado pelo usuário.")
+            
+            manifest = {
+                "name": name,
+                "created": datetime.now().isoformat(sep=" "),
+                "previous": index[-1]["name"] if index else None,
+                "last_date_added": last_date_added,
+                "files": files}
+            manifest_data = json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8")
+            if tar is not None:
+                info = tarfile.TarInfo("manifest.json")
+                info.size = len(manifest_data)
+                info.mtime = time.time()
+                tar.addfile(info, io.BytesIO(manifest_data))
+                tar.close()
+                tar = None
+            else:
+                with open(os.path.join(partial, "manifest.json"), "wb") as f:
+                    f.write(manifest_data)
+            os.replace(partial, target)
+            
+            index.append({
+                "name": name,
+                "archive": self.as_archive,
+                "created": manifest["created"],
+                "file_count": len(files),
+                "copied_count": len(to_copy)})
+            with open(os.path.join(self.backup_folder, BACKUP_INDEX_NAME), "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False, indent=1)
+            self.progress_updated.emit(100)
+            self.finish(True, f"Backup {name} concluído: {len(to_copy)} arquivos novos copiados, {len(files)} no snapshot.")
+        except Exception as e:
+            if tar is not None:
+                tar.close()
+            if os.path.isdir(partial):
+                shutil.rmtree(partial, ignore_errors=True)
+            elif os.path.exists(partial):
+                os.remove(partial)
+            message = str(e) if isinstance(e, InterruptedError) else f"Erro ao criar backup: {str(e)}"
+            self.finish(False, message)
+        finally:
+            if os.path.exists(db_copy):
+                os.remove(db_copy)
+
+
+class RestoreJob(Job):
+    """Reconstrói um snapshot: banco de dados e arquivos armazenados.
+
+    Os arquivos são buscados no snapshot indicado pelo manifesto; os que já
+    estão na pasta de armazenamento com o mesmo tamanho não são copiados de novo.
+    """
+    kind = JOB_WRITER
+    
+    def __init__(self, db_manager, backup_folder, snapshot_name, storage_folder, max_bytes_per_second=0):
+        super().__init__(f"Restaurar {snapshot_name}")
+        self.db_manager = db_manager
+        self.backup_folder = backup_folder
+        self.snapshot_name = snapshot_name
+        self.storage_folder = storage_folder
+        self.throttle = Throttle(max_bytes_per_second, self.add_bytes)
+        
+    def run(self):
+        import tarfile
+        entries = {entry["name"]: entry for entry in load_backup_index(self.backup_folder)}
+        db_copy = os.path.join(self.backup_folder, self.snapshot_name + ".restore.db")
+        try:
+            entry = entries[self.snapshot_name]
+            manifest = read_backup_manifest(self.backup_folder, entry)
+            os.makedirs(self.storage_folder, exist_ok=True)
+            
+            # Agrupar os arquivos pelo snapshot onde estão guardados
+            by_source = {}
+            for stored_name, source_name in manifest["files"].items():
+                by_source.setdefault(source_name, []).append(stored_name)
+            total = len(manifest["files"]) or 1
+            done = 0
+            for source_name, stored_names in by_source.items():
+                source_entry = entries[source_name]
+                tar = None
+                if source_entry["archive"]:
+                    tar = tarfile.open(os.path.join(self.backup_folder, source_name + ".tar"), "r")
+                try:
+                    for stored_name in stored_names:
+                        if not self.checkpoint():
+                            raise InterruptedError("Restauração cancelada pelo usuário.")
+                        destination_path = os.path.join(self.storage_folder, stored_name)
+                        if tar is not None:
+                            member = tar.getmember("arquivos/" + stored_name)
+                            size = member.size
+                        else:
+                            source_path = os.path.join(self.backup_folder, source_name, "arquivos", stored_name)
+                            size = os.path.getsize(source_path)
+                        if not (os.path.exists(destination_path) and os.path.getsize(destination_path) == size):
+                            self.status_updated.emit(f"Restaurando: {stored_name}")
+                            with open(destination_path, "wb") as destination_file:
+                                if tar is not None:
+                                    copy_stream(tar.extractfile(member), destination_file, self.throttle)
+                                else:
+                                    with open(source_path, "rb") as source_file:
+                                        copy_stream(source_file, destination_file, self.throttle)
+                        done += 1
+                        self.add_items()
+                        self.progress_updated.emit(int(done / total * 90))
+                finally:
+                    if tar is not None:
+                        tar.close()
+            
+            # Substituir o conteúdo do banco pelo do snapshot
+            self.status_updated.emit("Restaurando banco de dados...")
+            if entry["archive"]:
+                with tarfile.open(os.path.join(self.backup_folder, self.snapshot_name + ".tar"), "r") as tar:
+                    with open(db_copy, "wb") as destination_file:
+                        copy_stream(tar.extractfile("file_database.db"), destination_file, self.throttle)
+                snapshot_db = db_copy
+            else:
+                snapshot_db = os.path.join(self.backup_folder, self.snapshot_name, "file_database.db")
+            source = sqlite3.connect(snapshot_db)
+            destination = sqlite3.connect(self.db_manager.db_path)
+            source.backup(destination)
+            source.close()
+            destination.close()
+            # O snapshot pode ser de uma versão anterior do esquema
+            self.db_manager.reload()
+            self.progress_updated.emit(100)
+            self.finish(True, f"Snapshot {self.snapshot_name} restaurado: {len(manifest['files'])} arquivos.")
+        except Exception as e:
+            message = str(e) if isinstance(e, InterruptedError) else f"Erro ao restaurar backup: {str(e)}"
+            self.finish(False, message)
+        finally:
+            if os.path.exists(db_copy):
+                os.remove(db_copy)
+
+
+def partial_file_hash(file_path):
+    """Hash do primeiro e do último bloco do arquivo (executado no pool de processos)"""
+    import hashlib
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        digest.update(f.read(DUPLICATE_BLOCK_SIZE))
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size > DUPLICATE_BLOCK_SIZE:
+            f.seek(max(DUPLICATE_BLOCK_SIZE, size - DUPLICATE_BLOCK_SIZE))
+            digest.update(f.read(DUPLICATE_BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+def full_file_hash(file_path):
+    """Hash do conteúdo completo do arquivo (executado no pool de processos)"""
+    import hashlib
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(BACKUP_COPY_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DuplicateFinderJob(Job):
+    """Procura arquivos armazenados com conteúdo idêntico.
+
+    Os candidatos são agrupados pelo tamanho; depois comparados pelo hash do
+    primeiro e último bloco, e só os que empatam têm o conteúdo completo lido.
+    Os hashes ficam gravados em file_hashes (validados por tamanho e mtime),
+    então as próximas buscas só calculam o que mudou.
+    """
+    def __init__(self, db_manager):
+        super().__init__("Procurar duplicatas")
+        self.db_manager = db_manager
+        
+    def hash_paths(self, executor, function, paths, progress_start, progress_end):
+        results = {}
+        for i, (file_path, digest) in enumerate(zip(paths, executor.map(function, paths, chunksize=8))):
+            if not self.checkpoint():
+                break
+            results[file_path] = digest
+            self.add_items()
+            self.progress_updated.emit(progress_start + int((i + 1) / len(paths) * (progress_end - progress_start)))
+        return results
+        
+    def run(self):
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            self.status_updated.emit("Agrupando arquivos por tamanho...")
+            rows = self.db_manager.get_duplicate_candidates()
+            cache = self.db_manager.get_cached_hashes()
+            
+            # Um arquivo físico pode ter vários registros (arquivos já religados)
+            records = {}
+            sizes = {}
+            for file_id, original_name, file_path, file_size, date_added in rows:
+                records.setdefault(file_path, []).append((file_id, original_name, date_added))
+                sizes[file_path] = file_size
+            hashes = {}
+            for file_path in records:
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                cached = cache.get(file_path)
+                if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime:
+                    hashes[file_path] = [stat.st_size, stat.st_mtime, cached[2], cached[3]]
+                else:
+                    hashes[file_path] = [stat.st_size, stat.st_mtime, None, None]
+            
+            def groups_by(key_index, paths):
+                groups = {}
+                for file_path in paths:
+                    key = (hashes[file_path][0], hashes[file_path][key_index])
+                    groups.setdefault(key, []).append(file_path)
+                return [group for group in groups.values() if len(group) > 1]
+            
+            partial_groups = []
+            executor = ProcessPoolExecutor()
+            try:
+                # Hash parcial apenas dos arquivos cujo tamanho se repete
+                size_groups = groups_by(0, hashes)
+                pending = [p for group in size_groups for p in group if hashes[p][2] is None]
+                self.status_updated.emit(f"Calculando hash parcial de {len(pending)} arquivos...")
+                for file_path, digest in self.hash_paths(executor, partial_file_hash, pending, 0, 40).items():
+                    hashes[file_path][2] = digest
+                    # Arquivos pequenos já foram lidos por inteiro
+                    if hashes[file_path][0] <= 2 * DUPLICATE_BLOCK_SIZE:
+                        hashes[file_path][3] = digest
+                        
+                # Hash completo apenas dos que empataram no hash parcial
+                if self.is_running:
+                    candidates = [p for group in size_groups for p in group if hashes[p][2] is not None]
+                    partial_groups = groups_by(2, candidates)
+                    pending = [p for group in partial_groups for p in group if hashes[p][3] is None]
+                    self.status_updated.emit(f"Calculando hash completo de {len(pending)} arquivos...")
+                    for file_path, digest in self.hash_paths(executor, full_file_hash, pending, 40, 95).items():
+                        hashes[file_path][3] = digest
+            finally:
+                # Ao cancelar, descartar os hashes que ainda não começaram
+                executor.shutdown(cancel_futures=not self.is_running)
+                    
+            self.db_manager.save_hashes({p: values for p, values in hashes.items() if values[2] is not None})
+            if not self.is_running:
+                self.status_updated.emit("Operação cancelada pelo usuário.")
+                self.finish(False, [])
+                return
+            
+            candidates = [p for group in partial_groups for p in group if hashes[p][3] is not None]
+            duplicates = []
+            for group in groups_by(3, candidates):
+                duplicates.append({
+                    'hash': hashes[group[0]][3],
+                    'file_size': sizes[group[0]],
+                    'copies': [(file_path, records[file_path]) for file_path in group]})
+            self.progress_updated.emit(100)
+            self.status_updated.emit(f"Concluído! {len(duplicates)} grupos de duplicatas encontrados.")
+            self.finish(True, duplicates)
+        except Exception as e:
+            self.status_updated.emit(f"Erro crítico: {str(e)}")
+            self.finish(False, [])
+
+
+class DuplicateActionJob(Job):
+    """Religa ou exclui as cópias duplicadas escolhidas no relatório.
+
+    Grupo a grupo, os registros são alterados no banco e só depois do commit
+    as cópias armazenadas são apagadas; um erro do banco interrompe a tarefa
+    sem apagar as cópias do grupo que falhou.
+    """
+    kind = JOB_WRITER
+    
+    def __init__(self, db_manager, groups, relink):
+        super().__init__("Religar duplicatas" if relink else "Excluir duplicatas")
+        self.db_manager = db_manager
+        self.groups = groups
+        self.relink = relink
+        
+    def remove_stored_files(self, file_paths):
+        errors = []
+        for file_path in file_paths:
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                errors.append(f"{file_path}: {str(e)}")
+        return errors
+    
+    def run(self):
+        processed = []
+        errors = []
+        for i, (kept_path, duplicate_paths) in enumerate(self.groups):
+            if not self.checkpoint():
+                break
+            try:
+                if self.relink:
+                    self.db_manager.relink_files(kept_path, duplicate_paths)
+                else:
+                    self.db_manager.delete_files_by_path(duplicate_paths)
+            except sqlite3.Error as e:
+                errors.append(f"Erro no banco de dados: {str(e)}")
+                self.finish(False, (processed, errors))
+                return
+            errors.extend(self.remove_stored_files(duplicate_paths))
+            processed.extend(duplicate_paths)
+            self.add_items(len(duplicate_paths))
+            self.progress_updated.emit(int((i + 1) / len(self.groups) * 100))
+        if not self.is_running:
+            errors.append("Operação cancelada pelo usuário.")
+        self.finish(self.is_running, (processed, errors))
+
+
+class DuplicatesDialog(QDialog):
+    """Relatório de duplicatas com ações em lote.
+
+    Em cada grupo a cópia marcada é mantida (por padrão a adicionada primeiro);
+    as demais podem ser excluídas ou ter seus registros religados à mantida.
+    As ações rodam no agendador como tarefa de gravação.
+    """
+    def __init__(self, duplicates, db_manager, job_scheduler, format_file_size, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Arquivos Duplicados")
+        self.resize(800, 450)
+        self.db_manager = db_manager
+        self.job_scheduler = job_scheduler
+        self.running_job = None
+        self.changed = False
+        layout = QVBoxLayout()
+        wasted = sum(group['file_size'] * (len(group['copies']) - 1) for group in duplicates)
+        self.summary_label = QLabel(
+            f"{len(duplicates)} grupos de duplicatas, {format_file_size(wasted)} ocupados por cópias extras. "
+            "Marque as cópias que devem ser mantidas.")
+        layout.addWidget(self.summary_label)
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setColumnCount(4)
+        self.tree.setHeaderLabels(["Arquivo", "IDs", "Data de Adição", "Caminho"])
+        self.tree.setColumnWidth(0, 250)
+        self.tree.setColumnWidth(1, 80)
+        self.tree.setColumnWidth(2, 140)
+        for group in duplicates:
+            group_item = QtWidgets.QTreeWidgetItem(self.tree)
+            group_item.setText(0, f"{len(group['copies'])} cópias de {format_file_size(group['file_size'])}")
+            group_item.setText(3, group['hash'])
+            # Manter por padrão a cópia com o registro mais antigo
+            kept_path = min(group['copies'], key=lambda copy: min(record[0] for record in copy[1]))[0]
+            for file_path, records in group['copies']:
+                item = QtWidgets.QTreeWidgetItem(group_item)
+                item.setText(0, records[0][1])
+                item.setText(1, ", ".join(str(record[0]) for record in records))
+                item.setText(2, str(min(record[2] for record in records)))
+                item.setText(3, file_path)
+                item.setCheckState(0, QtCore.Qt.Checked if file_path == kept_path else QtCore.Qt.Unchecked)
+                item.setData(0, QtCore.Qt.UserRole, file_path)
+            group_item.setExpanded(True)
+        layout.addWidget(self.tree)
+        buttons = QtWidgets.QHBoxLayout()
+        self.relink_button = QtWidgets.QPushButton("Religar ao Mantido")
+        self.relink_button.clicked.connect(self.relink_duplicates)
+        buttons.addWidget(self.relink_button)
+        self.delete_button = QtWidgets.QPushButton("Excluir Duplicatas")
+        self.delete_button.clicked.connect(self.delete_duplicates)
+        buttons.addWidget(self.delete_button)
+        # Cancelar a ação na fila (por exemplo, atrás de uma importação) ou em andamento
+        self.cancel_button = QtWidgets.QPushButton("Cancelar")
+        self.cancel_button.clicked.connect(self.cancel_action)
+        self.cancel_button.setEnabled(False)
+        buttons.addWidget(self.cancel_button)
+        self.close_button = QtWidgets.QPushButton("Fechar")
+        self.close_button.clicked.connect(self.accept)
+        buttons.addWidget(self.close_button)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+        
+    def selected_groups(self):
+        """(caminho mantido, [caminhos duplicados]) dos grupos com uma cópia marcada"""
+        groups = []
+        for i in range(self.tree.topLevelItemCount()):
+            group_item = self.tree.topLevelItem(i)
+            kept = [group_item.child(j) for j in range(group_item.childCount())
+                    if group_item.child(j).checkState(0) == QtCore.Qt.Checked]
+            others = [group_item.child(j) for j in range(group_item.childCount())
+                      if group_item.child(j).checkState(0) != QtCore.Qt.Checked]
+            if kept and others:
+                groups.append((kept[0].data(0, QtCore.Qt.UserRole),
+                               [item.data(0, QtCore.Qt.UserRole) for item in others]))
+        return groups
+    
+    def apply_action(self, question, relink):
+        groups = self.selected_groups()
+        duplicate_count = sum(len(paths) for _, paths in groups)
+        if not duplicate_count:
+            QMessageBox.information(self, "Duplicatas", "Nenhuma cópia desmarcada para processar.")
+            return
+        answer = QMessageBox.question(self, "Duplicatas", question.format(duplicate_count),
+                                      QMessageBox.Yes | QMessageBox.No)
+        if answer != QMessageBox.Yes:
+            return
+        self.running_job = DuplicateActionJob(self.db_manager, groups, relink)
+        self.running_job.finished_signal.connect(self.action_finished)
+        for button in (self.relink_button, self.delete_button, self.close_button):
+            button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.summary_label.setText(f"Processando {duplicate_count} cópias...")
+        self.job_scheduler.submit(self.running_job)
+        
+    def action_finished(self, success, result):
+        # Cancelada na fila ou erro inesperado: o agendador envia só a mensagem
+        processed, errors = result if isinstance(result, tuple) else ([], [result])
+        self.running_job = None
+        for button in (self.relink_button, self.delete_button, self.close_button):
+            button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        processed = set(processed)
+        self.changed = self.changed or bool(processed)
+        # Remover do relatório as cópias processadas
+        for i in reversed(range(self.tree.topLevelItemCount())):
+            group_item = self.tree.topLevelItem(i)
+            for j in reversed(range(group_item.childCount())):
+                if group_item.child(j).data(0, QtCore.Qt.UserRole) in processed:
+                    group_item.removeChild(group_item.child(j))
+            if group_item.childCount() < 2:
+                self.tree.takeTopLevelItem(i)
+        self.summary_label.setText(f"{len(processed)} cópias processadas.")
+        if errors:
+            QMessageBox.warning(self, "Erro", "Não foi possível concluir:\n" + "\n".join(errors))
+        else:
+            QMessageBox.information(self, "Sucesso", f"{len(processed)} cópias processadas.")
+            
+    def cancel_action(self):
+        if self.running_job is not None:
+            self.job_scheduler.cancel(self.running_job)
+            
+    def done(self, result):
+        # Fechar só depois que a ação em andamento terminar ou for cancelada
+        if self.running_job is None:
+            super().done(result)
+            
+    def relink_duplicates(self):
+        self.apply_action(
+            "Os registros de {} cópias passarão a apontar para o arquivo mantido e as cópias serão apagadas. Continuar?",
+            True)
+        
+    def delete_duplicates(self):
+        self.apply_action("{} cópias e seus registros serão excluídos. Continuar?", False)
+
+
+def decode_text(data):
+    """Texto dos arquivos pesquisáveis: UTF-8 ou, se inválido, CP1252"""
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("cp1252", errors="replace")
+
+
+def search_file_content(file_path, needle):
+    """Procurar o termo já em casefold no texto do arquivo, lido em blocos (executado no pool de processos)
+
+    O texto é decodificado como em decode_text e comparado em casefold, como
+    no índice de conteúdo, para os dois caminhos encontrarem os mesmos arquivos.
+    """
+    import codecs
+    for encoding, errors in (("utf-8", "strict"), ("cp1252", "replace")):
+        decoder = codecs.getincrementaldecoder(encoding)(errors)
+        tail = ""
+        found = False
+        try:
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(BACKUP_COPY_CHUNK), b""):
+                    if found:
+                        # Achado em UTF-8: só vale se o arquivo inteiro decodificar,
+                        # senão o índice guardaria o texto em CP1252
+                        decoder.decode(chunk)
+                        continue
+                    text = tail + decoder.decode(chunk).casefold()
+                    if needle in text:
+                        if errors == "replace":
+                            return True
+                        found = True
+                        continue
+                    # Manter o final do bloco para achar o termo dividido entre dois blocos
+                    tail = text[len(text) - len(needle) + 1:] if len(needle) > 1 else ""
+                text = decoder.decode(b"", final=True)
+                return found or needle in tail + text.casefold()
+        except UnicodeDecodeError:
+            continue
+        except OSError:
+            return False
+    return False
+
+
+class ContentSearchThread(QThread):
+    """Pesquisa um termo dentro dos arquivos de texto armazenados.
+
+    Arquivos já indexados na ingestão são consultados no índice de texto;
+    os demais são varridos em blocos num pool de processos. Os dois caminhos
+    comparam o texto em casefold. Os resultados vão para a interface à medida
+    que aparecem, no mesmo formato da FileSearchThread.
+    """
+    batch_loaded = pyqtSignal(object, bool)
+    search_finished = pyqtSignal(int)
+    progress_updated = pyqtSignal(int, int)
+    
+    def __init__(self, db_manager, search_term):
+        super().__init__()
+        self.db_manager = db_manager
+        self.search_term = search_term
+        self.is_running = True
+        
+    def emit_matches(self, rows):
+        batch = FileListCache()
+        batch.append_rows(rows)
+        self.batch_loaded.emit(batch, False)
+        
+    def run(self):
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        total = 0
+        try:
+            self.db_manager.ensure_database()
+            # Limpar a lista antes dos primeiros resultados
+            self.batch_loaded.emit(FileListCache(), True)
+            candidates = self.db_manager.get_content_search_candidates()
+            indexed_ids = self.db_manager.get_indexed_content_ids()
+            
+            # Arquivos indexados: resposta direta do índice
+            if indexed_ids:
+                matched_ids = self.db_manager.search_content_index(self.search_term)
+                matches = [row[:-1] for row in candidates if row[0] in matched_ids]
+                if matches:
+                    self.emit_matches(matches)
+                    total += len(matches)
+            
+            # Demais arquivos: varredura em paralelo
+            to_scan = [row for row in candidates if row[0] not in indexed_ids]
+            scanned = len(candidates) - len(to_scan)
+            self.progress_updated.emit(scanned, len(candidates))
+            needle = self.search_term.casefold()
+            executor = ProcessPoolExecutor()
+            try:
+                futures = {executor.submit(search_file_content, row[-1], needle): row for row in to_scan}
+                pending_matches = []
+                last_emit = time.monotonic()
+                for future in as_completed(futures):
+                    if not self.is_running:
+                        break
+                    scanned += 1
+                    if future.result():
+                        pending_matches.append(futures[future][:-1])
+                    # Enviar em pequenos lotes para não sobrecarregar a interface
+                    if time.monotonic() - last_emit >= CONTENT_SEARCH_EMIT_INTERVAL:
+                        if pending_matches:
+                            self.emit_matches(pending_matches)
+                            total += len(pending_matches)
+                            pending_matches = []
+                        self.progress_updated.emit(scanned, len(candidates))
+                        last_emit = time.monotonic()
+                if pending_matches and self.is_running:
+                    self.emit_matches(pending_matches)
+                    total += len(pending_matches)
+            finally:
+                executor.shutdown(cancel_futures=True)
+        except Exception as e:
+            print(f"Erro na pesquisa de conteúdo: {e}")
+        if self.is_running:
+            self.search_finished.emit(total)
+            
+    def stop(self):
+        self.is_running = False
+
+
+class JobsPanel(QtWidgets.QDockWidget):
+    """Painel não modal com as tarefas do JobScheduler e a vazão de cada uma"""
+    def __init__(self, scheduler, format_file_size, parent=None):
+        super().__init__("Tarefas", parent)
+        self.setObjectName("jobsPanel")
+        self.scheduler = scheduler
+        self.format_file_size = format_file_size
+        self.items = {}
+        widget = QtWidgets.QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(3, 3, 3, 3)
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setColumnCount(5)
+        self.tree.setHeaderLabels(["Tarefa", "Estado", "Progresso", "Vazão", "Situação"])
+        self.tree.setRootIsDecorated(False)
+        self.tree.setColumnWidth(0, 200)
+        self.tree.setColumnWidth(1, 90)
+        self.tree.setColumnWidth(2, 120)
+        self.tree.setColumnWidth(3, 90)
+        layout.addWidget(self.tree)
+        buttons = QtWidgets.QHBoxLayout()
+        for label, action in (("Pausar", scheduler.pause),
+                              ("Retomar", scheduler.resume),
+                              ("Cancelar", scheduler.cancel)):
+            button = QtWidgets.QPushButton(label)
+            button.clicked.connect(lambda checked, action=action: self.apply_to_selected(action))
+            buttons.addWidget(button)
+        clear_button = QtWidgets.QPushButton("Limpar Concluídas")
+        clear_button.clicked.connect(self.clear_finished)
+        buttons.addWidget(clear_button)
+        layout.addLayout(buttons)
+        self.setWidget(widget)
+        
+        scheduler.job_added.connect(self.add_job)
+        scheduler.job_changed.connect(self.update_job)
+        # Vazão calculada pela diferença entre duas leituras
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.update_throughput)
+        self.timer.start(JOBS_PANEL_REFRESH_MS)
+        
+    def add_job(self, job):
+        item = QtWidgets.QTreeWidgetItem(self.tree)
+        item.setText(0, job.title)
+        progress_bar = QProgressBar()
+        progress_bar.setRange(0, 100)
+        progress_bar.setValue(0)
+        self.tree.setItemWidget(item, 2, progress_bar)
+        job.progress_updated.connect(progress_bar.setValue)
+        job.status_updated.connect(lambda text, item=item: item.setText(4, text))
+        self.items[job] = (item, [job.bytes_done, job.items_done, time.monotonic()])
+        self.update_job(job)
+        if not job.silent:
+            self.show()
+        
+    def update_job(self, job):
+        if job in self.items:
+            item = self.items[job][0]
+            item.setText(1, job.state)
+            if job.state in (JOB_DONE, JOB_CANCELLED, JOB_FAILED, JOB_PAUSED):
+                item.setText(3, "")
+            # Tarefas silenciosas só continuam na lista se terminarem com erro
+            if job.silent and job.state in (JOB_DONE, JOB_CANCELLED):
+                self.remove_job(job)
+                
+    def remove_job(self, job):
+        item = self.items.pop(job)[0]
+        self.tree.takeTopLevelItem(self.tree.indexOfTopLevelItem(item))
+                
+    def update_throughput(self):
+        now = time.monotonic()
+        for job, (item, last) in self.items.items():
+            if job.state != JOB_RUNNING:
+                continue
+            elapsed = now - last[2]
+            if job.bytes_done:
+                item.setText(3, f"{self.format_file_size((job.bytes_done - last[0]) / elapsed)}/s")
+            elif job.items_done:
+                item.setText(3, f"{(job.items_done - last[1]) / elapsed:.1f} itens/s")
+            last[:] = [job.bytes_done, job.items_done, now]
+            
+    def apply_to_selected(self, action):
+        selected = set(self.tree.selectedItems())
+        for job, (item, _) in list(self.items.items()):
+            if item in selected:
+                action(job)
+                
+    def clear_finished(self):
+        for job in list(self.items):
+            if job.state in (JOB_DONE, JOB_CANCELLED, JOB_FAILED):
+                self.remove_job(job)
+
+
+BUTTON_STYLE = """
+            QPushButton {
+                background-color: rgb(182, 0, 0);
+                color: white;
+                border: none;
+                border-radius: 3px;
+                padding: 5px 10px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: rgb(255, 0, 0);
+                color: rgb(0, 0, 0) 
+            }
+            QPushButton:pressed {
+                background-color: rgb(255, 255, 255);
+                color: rgb(0, 0, 0)} """
 
 
 class MainApp(QtWidgets.QMainWindow):
@@ -303,26 +2050,49 @@ class MainApp(QtWidgets.QMainWindow):
         # Configurações iniciais
         self.storage_folder = "arquivos_armazenados"
         
-        # Inicializar banco de dados
-        self.db_manager = DatabaseManager()
+        # Banco de dados é aberto em segundo plano, depois que a janela aparece
+        self.db_manager = DatabaseManager(lazy_init=True)
         
         # Threads
-        self.organizer_thread = None
         self.search_thread = None
-        self.download_thread = None
+        self.access_tracker = AccessTrackerThread(self.db_manager)
+        self.access_tracker.start()
+        
+        # Importações, downloads, backups e manutenção rodam no agendador,
+        # acompanhados pelo painel de tarefas (aparece ao enviar uma tarefa não silenciosa)
+        self.job_scheduler = JobScheduler(parent=self)
+        self.jobs_panel = JobsPanel(self.job_scheduler, self.format_file_size, self)
+        self.addDockWidget(QtCore.Qt.BottomDockWidgetArea, self.jobs_panel)
+        self.jobs_panel.hide()
         
-        # Dialog de progresso
-        self.progress_dialog = None
+        # Manutenção periódica do banco (incremental_vacuum e ANALYZE quando necessário)
+        self.maintenance_timer = QtCore.QTimer(self)
+        self.maintenance_timer.timeout.connect(self.schedule_maintenance)
+        self.maintenance_timer.start(MAINTENANCE_INTERVAL_MS)
+        
+        # Visão atual da lista: "all", "recent" ou "most_used"
+        self.current_view = "all"
+        # Ordem (coluna, Qt.SortOrder) das linhas da carga em andamento
+        self.load_order = FileListModel.DATE_ADDED_ORDER
+        
+        # Listagem exibida na lista (detalhes completos são buscados no banco pelo id)
+        self.file_model = FileListModel(self.format_file_size, self.format_date, self)
         
         # Configurar interface
-        self.setup_connections()
         self.setup_tree_widget()
+        self.setup_connections()
         
         # Aplicar estilo
         self.apply_styles()
         
-        # Carregar arquivos do banco de dados
-        self.load_files_from_database()
+        # Exibir os arquivos mais recentes do snapshot e carregar o restante
+        # do banco de dados assim que o loop de eventos começar
+        snapshot = self.db_manager.load_snapshot()
+        if snapshot:
+            self.display_files(snapshot, FileListModel.DATE_ADDED_ORDER)
+        else:
+            self.file_model.set_files(FileListCache(), "Carregando arquivos...")
+        QtCore.QTimer.singleShot(0, self.load_files_from_database)
         
     def setup_connections(self):
         self.ui.btn_procurar.clicked.connect(self.search_files)
@@ -332,41 +2102,98 @@ class MainApp(QtWidgets.QMainWindow):
         # Conectar busca com Enter
         self.ui.search_edit.returnPressed.connect(self.search_files)
         
-        # Conectar duplo clique na tree
-        self.ui.treeWidget.itemDoubleClicked.connect(self.on_item_double_click)
+        # Conectar duplo clique na lista
+        self.file_view.doubleClicked.connect(self.on_item_double_click)
         
         # Conectar menu de contexto
-        self.ui.treeWidget.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.ui.treeWidget.customContextMenuRequested.connect(self.show_context_menu)
+        self.file_view.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.file_view.customContextMenuRequested.connect(self.show_context_menu)
+        
+        # Menu de visões da lista
+        view_menu = self.menuBar().addMenu("EXIBIR")
+        view_group = QtWidgets.QActionGroup(self)
+        for label, view in (("Todos os arquivos", "all"),
+                            ("Usados recentemente", "recent"),
+                            ("Mais usados", "most_used")):
+            action = QAction(label, self, checkable=True)
+            action.setChecked(view == "all")
+            action.triggered.connect(lambda checked, view=view: self.show_view(view))
+            view_group.addAction(action)
+            view_menu.addAction(action)
+        view_menu.addSeparator()
+        view_menu.addAction(self.jobs_panel.toggleViewAction())
+        self.content_search_action = QAction("Pesquisar no Conteúdo dos Arquivos", self, checkable=True)
+        view_menu.addAction(self.content_search_action)
+        
+        # Esc cancela a pesquisa em andamento
+        cancel_shortcut = QtWidgets.QShortcut(QtGui.QKeySequence(QtCore.Qt.Key_Escape), self)
+        cancel_shortcut.activated.connect(self.cancel_search)
+        
+        # Menu de backup
+        backup_menu = self.menuBar().addMenu("BACKUP")
+        backup_action = QAction("Criar Backup...", self)
+        backup_action.triggered.connect(self.create_backup)
+        backup_menu.addAction(backup_action)
+        restore_action = QAction("Restaurar Backup...", self)
+        restore_action.triggered.connect(self.restore_backup)
+        backup_menu.addAction(restore_action)
+        
+        # Menu de manutenção
+        maintenance_menu = self.menuBar().addMenu("MANUTENÇÃO")
+        duplicates_action = QAction("Procurar Duplicatas...", self)
+        duplicates_action.triggered.connect(self.find_duplicates)
+        maintenance_menu.addAction(duplicates_action)
+        database_action = QAction("Manutenção do Banco de Dados...", self)
+        database_action.triggered.connect(self.run_database_maintenance)
+        maintenance_menu.addAction(database_action)
         
     def setup_tree_widget(self):
-        """Configurar a tree widget"""
-        self.ui.treeWidget.setColumnCount(7)  # Adicionada coluna para ações
-        self.ui.treeWidget.setHeaderLabels(["ID", "Nome do Arquivo", "Tamanho", "Tipo", "Categoria", "Data de Adição", "Ações"])
+        """Trocar a tree widget do formulário por uma QTableView sobre o modelo da listagem"""
+        tree_widget = self.ui.treeWidget
+        # QTableView em vez de QTreeView: a lista não tem hierarquia e a tabela
+        # não refaz o layout de todas as linhas a cada lote inserido
+        self.file_view = QtWidgets.QTableView(tree_widget.parentWidget())
+        self.file_view.setObjectName("fileView")
+        if tree_widget.parentWidget().layout() is not None:
+            tree_widget.parentWidget().layout().replaceWidget(tree_widget, self.file_view)
+        else:
+            self.file_view.setGeometry(tree_widget.geometry())
+        tree_widget.hide()
+        tree_widget.deleteLater()
+        self.file_view.setModel(self.file_model)
+        # Aparência de lista, como a tree widget: linhas inteiras, sem grade e sem números de linha
+        self.file_view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.file_view.setShowGrid(False)
+        self.file_view.setWordWrap(False)
+        self.file_view.horizontalHeader().setStretchLastSection(True)
+        self.file_view.verticalHeader().hide()
+        # Linhas de mesma altura: a view não precisa medir cada linha
+        self.file_view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.file_view.verticalHeader().setDefaultSectionSize(self.file_view.fontMetrics().height() + 10)
         
         # Ajustar largura das colunas
-        self.ui.treeWidget.setColumnWidth(0, 50)   # ID
-        self.ui.treeWidget.setColumnWidth(1, 250)  # Nome
-        self.ui.treeWidget.setColumnWidth(2, 100)  # Tamanho
-        self.ui.treeWidget.setColumnWidth(3, 120)  # Tipo
-        self.ui.treeWidget.setColumnWidth(4, 150)  # Categoria
-        self.ui.treeWidget.setColumnWidth(5, 120)  # Data
-        self.ui.treeWidget.setColumnWidth(6, 100)  # Ações
+        self.file_view.setColumnWidth(0, 50)   # ID
+        self.file_view.setColumnWidth(1, 250)  # Nome
+        self.file_view.setColumnWidth(2, 100)  # Tamanho
+        self.file_view.setColumnWidth(3, 120)  # Tipo
+        self.file_view.setColumnWidth(4, 150)  # Categoria
+        self.file_view.setColumnWidth(5, 120)  # Data
+        self.file_view.setColumnWidth(6, 100)  # Ações
         # Permitir ordenação
-        self.ui.treeWidget.setSortingEnabled(True)
+        self.file_view.setSortingEnabled(True)
         
     def apply_styles(self):
-        self.ui.treeWidget.setStyleSheet("""
-            QTreeWidget {
+        self.file_view.setStyleSheet("""
+            QTableView {
                 background-color: white;
                 border: 1px solid #cccccc;
                 border-radius: 3px;
             }
-            QTreeWidget::item {
+            QTableView::item {
                 padding: 5px;
                 border-bottom: 1px solid #eeeeee;
             }
-            QTreeWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #0078d4;
                 color: white;}""")
         
@@ -377,54 +2204,10 @@ class MainApp(QtWidgets.QMainWindow):
                 border-radius: 3px;
                 background-color: white;}""")
         
-        self.ui.btn_procurar.setStyleSheet("""
-            QPushButton {
-                background-color: rgb(182, 0, 0);
-                color: white;
-                border: none;
-                border-radius: 3px;
-                padding: 5px 10px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: rgb(255, 0, 0);
-                color: rgb(0, 0, 0) 
-            }
-            QPushButton:pressed {
-                background-color: rgb(255, 255, 255);
-                color: rgb(0, 0, 0)} """)
-        self.ui.btn_add.setStyleSheet("""
-            QPushButton {
-                background-color: rgb(182, 0, 0);
-                color: white;
-                border: none;
-                border-radius: 3px;
-                padding: 5px 10px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: rgb(255, 0, 0);
-                color: rgb(0, 0, 0)   
-            }
-            QPushButton:pressed {
-                background-color: rgb(255, 255, 255);
-                color: rgb(0, 0, 0)}""")
-        self.ui.btn_atualizar.setStyleSheet("""
-            QPushButton {
-                background-color: rgb(182, 0, 0);
-                color: white;
-                border: none;
-                border-radius: 3px;
-                padding: 5px 10px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: rgb(255, 0, 0);
-                color: rgb(0, 0, 0) 
-            }
-            QPushButton:pressed {
-                background-color: rgb(255, 255, 255);
-                color: rgb(0, 0, 0)} """)
+        # Mesma folha de estilo para os três botões
+        self.ui.btn_procurar.setStyleSheet(BUTTON_STYLE)
+        self.ui.btn_add.setStyleSheet(BUTTON_STYLE)
+        self.ui.btn_atualizar.setStyleSheet(BUTTON_STYLE)
         
     def format_file_size(self, size_bytes):
         if size_bytes == 0:
@@ -446,58 +2229,113 @@ class MainApp(QtWidgets.QMainWindow):
         except:
             return date_string
         
+    def show_view(self, view):
+        self.current_view = view
+        self.load_files_from_database(self.ui.search_edit.text().strip())
+        
     def load_files_from_database(self, search_term=""):
-        self.search_thread = FileSearchThread(self.db_manager, search_term)
-        self.search_thread.search_finished.connect(self.display_files)
+        # Descartar uma carga anterior que ainda esteja em andamento
+        self.stop_search_thread()
+        # Ordem em que as linhas chegam do banco; as visões de uso e a pesquisa
+        # de conteúdo têm ordem própria, sem coluna correspondente no cabeçalho
+        content_search = bool(search_term) and self.content_search_action.isChecked()
+        if content_search or self.current_view != "all":
+            self.load_order = None
+        else:
+            self.load_order = FileListModel.DATE_ADDED_ORDER
+        if content_search:
+            self.search_thread = ContentSearchThread(self.db_manager, search_term)
+            self.search_thread.progress_updated.connect(self.content_search_progress)
+        else:
+            self.search_thread = FileSearchThread(
+                self.db_manager, search_term, self.current_view, self.access_tracker)
+        self.search_thread.batch_loaded.connect(self.files_batch_loaded)
+        self.search_thread.search_finished.connect(self.files_load_finished)
         self.search_thread.start()
         
-    def display_files(self, files):
-        self.ui.treeWidget.clear()
+    def stop_search_thread(self):
+        if self.search_thread and self.search_thread.isRunning():
+            self.search_thread.stop()
+            self.search_thread.batch_loaded.disconnect()
+            self.search_thread.search_finished.disconnect()
+            return True
+        return False
         
-        if not files:
-            item = QtWidgets.QTreeWidgetItem(self.ui.treeWidget)
-            item.setText(1, "Nenhum arquivo encontrado")
-            return
+    def cancel_search(self):
+        if self.stop_search_thread():
+            self.file_view.horizontalHeader().setSectionsClickable(True)
+            self.statusBar().showMessage(f"Pesquisa cancelada: {len(self.file_model.files)} arquivos encontrados.", 5000)
+        
+    def content_search_progress(self, scanned, total):
+        self.statusBar().showMessage(
+            f"Pesquisando conteúdo: {scanned}/{total} arquivos, {len(self.file_model.files)} encontrados (Esc cancela)")
+        
+    def files_batch_loaded(self, files, first_batch):
+        if first_batch:
+            # Sem ordenação pelo cabeçalho durante a carga: os lotes seguintes
+            # continuam na ordem do banco
+            self.file_view.horizontalHeader().setSectionsClickable(False)
+            self.file_model.set_files(files, order=self.load_order)
+            self.show_sort_indicator(self.load_order)
+        else:
+            self.file_model.append_files(files)
         
-        for file_data in files:
-            item = QtWidgets.QTreeWidgetItem(self.ui.treeWidget)
-            item.setText(0, str(file_data[0]))  # ID
-            item.setText(1, file_data[1])       # Nome original
-            item.setText(2, self.format_file_size(file_data[4]))  # Tamanho
-            item.setText(3, file_data[5])       # Tipo
-            item.setText(4, file_data[6])       # Categoria
-            item.setText(5, self.format_date(file_data[9]))  # Data de adição
-            item.setText(6, "📥 Download")      # Botão de download
-            # Armazenar dados completos no item
-            item.setData(0, QtCore.Qt.UserRole, file_data)
+    def files_load_finished(self, total):
+        if total == 0:
+            self.display_files(FileListCache())
+        self.file_view.horizontalHeader().setSectionsClickable(True)
+        if isinstance(self.sender(), ContentSearchThread):
+            self.statusBar().showMessage(f"Pesquisa de conteúdo concluída: {total} arquivos encontrados.", 5000)
+        
+    def display_files(self, files, order=None):
+        self.file_model.set_files(files, "Nenhum arquivo encontrado", order)
+        self.show_sort_indicator(order)
+        
+    def show_sort_indicator(self, order):
+        """Mostrar no cabeçalho a ordem em que as linhas já estão, sem reordenar (None limpa)"""
+        header = self.file_view.horizontalHeader()
+        # Com os sinais bloqueados a view não chama FileListModel.sort
+        header.blockSignals(True)
+        if order is None:
+            header.setSortIndicator(-1, QtCore.Qt.AscendingOrder)
+        else:
+            header.setSortIndicator(*order)
+        header.blockSignals(False)
+            
+    def fetch_file_data(self, file_id):
+        file_data = self.db_manager.get_file(file_id)
+        if file_data is None:
+            QMessageBox.warning(self, "Erro", "Arquivo não encontrado no banco de dados!")
+        return file_data
             
     def show_context_menu(self, position):
-        item = self.ui.treeWidget.itemAt(position)
-        if item:
-            file_data = item.data(0, QtCore.Qt.UserRole)
-            if file_data:
-                menu = QMenu(self)
-                
-                # Ação de download
-                download_action = QAction("📥 Download Arquivo", self)
-                download_action.triggered.connect(lambda: self.download_file(file_data))
-                menu.addAction(download_action)
-                
-                # Ação de abrir
-                open_action = QAction("🔓 Abrir Arquivo", self)
-                open_action.triggered.connect(lambda: self.open_file(file_data))
-                menu.addAction(open_action)
-                
-                # Separador
-                menu.addSeparator()
+        file_id = self.file_model.file_id(self.file_view.indexAt(position))
+        if file_id is not None:
+            menu = QMenu(self)
+            
+            # Ação de download
+            download_action = QAction("📥 Download Arquivo", self)
+            download_action.triggered.connect(lambda: self.download_file(file_id))
+            menu.addAction(download_action)
+            
+            # Ação de abrir
+            open_action = QAction("🔓 Abrir Arquivo", self)
+            open_action.triggered.connect(lambda: self.open_file(file_id))
+            menu.addAction(open_action)
+            
+            # Separador
+            menu.addSeparator()
 
-                # Ação de informações
-                info_action = QAction("ℹ️ Informações", self)
-                info_action.triggered.connect(lambda: self.show_file_info(file_data))
-                menu.addAction(info_action)
-                menu.exec_(self.ui.treeWidget.viewport().mapToGlobal(position))
+            # Ação de informações
+            info_action = QAction("ℹ️ Informações", self)
+            info_action.triggered.connect(lambda: self.show_file_info(file_id))
+            menu.addAction(info_action)
+            menu.exec_(self.file_view.viewport().mapToGlobal(position))
     
-    def download_file(self, file_data):
+    def download_file(self, file_id):
+        file_data = self.fetch_file_data(file_id)
+        if file_data is None:
+            return
         original_name = file_data[1]  # Nome original
         stored_path = file_data[3]    # Caminho armazenado
         # Perguntar onde salvar
@@ -507,31 +2345,29 @@ class MainApp(QtWidgets.QMainWindow):
             original_name,
             f"Todos os arquivos (*.*)")
         if destination_path:
-            # Criar dialog de progresso para download
-            download_dialog = ProgressDialog(self)
-            download_dialog.setWindowTitle("Download em Andamento")
-            download_dialog.status_label.setText("Iniciando download...") 
-            # Iniciar thread de download
-            self.download_thread = DownloadThread(stored_path, destination_path)
-            self.download_thread.download_finished.connect(
-                lambda success, msg: self.download_finished(success, msg, download_dialog))
-            self.download_thread.progress_updated.connect(download_dialog.progress_bar.setValue)
-            self.download_thread.start()
-            # Mostrar dialog de progresso
-            download_dialog.exec_()
-    
-    def download_finished(self, success, message, dialog):
-        dialog.close()
+            job = DownloadJob(stored_path, destination_path)
+            job.finished_signal.connect(self.download_finished)
+            # Download tem prioridade: o usuário está esperando pelo arquivo
+            self.job_scheduler.submit(job, JOB_PRIORITY_HIGH)
+    
+    def download_finished(self, success, message):
+        self.job_finished_message(success, message)
+    
+    def job_finished_message(self, success, message):
+        # Sucesso na barra de status para não interromper o usuário; erros em aviso
         if success:
-            QMessageBox.information(self, "Sucesso", message)
+            self.statusBar().showMessage(message, 8000)
         else:
             QMessageBox.warning(self, "Erro", message)
     
-    def open_file(self, file_data):
+    def open_file(self, file_id):
+        file_data = self.fetch_file_data(file_id)
+        if file_data is None:
+            return
         file_path = file_data[3]  # Caminho armazenado
         if os.path.exists(file_path):
-            # Atualizar último acesso
-            self.db_manager.update_file_access(file_data[0])
+            # Registrar acesso (gravado em lote pela thread de acessos)
+            self.access_tracker.record(file_data[0])
             # Abrir arquivo
             try:
                 if sys.platform == "win32":
@@ -543,7 +2379,10 @@ class MainApp(QtWidgets.QMainWindow):
         else:
             QMessageBox.warning(self, "Erro", "Arquivo não encontrado!")
     
-    def show_file_info(self, file_data):
+    def show_file_info(self, file_id):
+        file_data = self.fetch_file_data(file_id)
+        if file_data is None:
+            return
         info_text = f"""
         <b>Informações do Arquivo:</b><br><br>
         <b>ID:</b> {file_data[0]}<br>
@@ -556,6 +2395,7 @@ class MainApp(QtWidgets.QMainWindow):
         <b>Descrição:</b> {file_data[8] or 'Nenhuma'}<br>
         <b>Data de Adição:</b> {self.format_date(file_data[9])}<br>
         <b>Último Acesso:</b> {self.format_date(file_data[10]) if file_data[10] else 'Nunca'}<br>
+        <b>Acessos:</b> {file_data[11]}<br>
         <b>Caminho:</b> {file_data[3]}"""
         QMessageBox.information(self, "Informações do Arquivo", info_text)
             
@@ -625,76 +2465,169 @@ class MainApp(QtWidgets.QMainWindow):
         self.start_organization(source_folder, category, file_extensions, file_type_desc)
         
     def start_organization(self, source_folder, category, file_extensions, file_type_desc):
-        # Criar e mostrar dialog de progresso
-        self.progress_dialog = ProgressDialog(self)
-        self.progress_dialog.cancel_button.clicked.connect(self.cancel_organization)
-        # Desabilitar botões durante a operação
-        self.ui.btn_add.setEnabled(False)
-        self.ui.btn_procurar.setEnabled(False)
-        self.ui.btn_atualizar.setEnabled(False)
-        # Iniciar thread de organização
-        self.organizer_thread = FileOrganizerThread(
+        job = FileOrganizerJob(
+            self.db_manager,
             source_folder, 
             self.storage_folder, 
             category,
             file_extensions)
-        self.organizer_thread.progress_updated.connect(self.progress_dialog.progress_bar.setValue)
-        self.organizer_thread.status_updated.connect(self.progress_dialog.status_label.setText)
-        self.organizer_thread.finished_signal.connect(self.organization_finished)
-        self.organizer_thread.start()
-        # Mostrar dialog de progresso
-        self.progress_dialog.exec_()
-        
-    def cancel_organization(self):
-        if self.organizer_thread and self.organizer_thread.isRunning():
-            self.organizer_thread.stop()
-            self.progress_dialog.status_label.setText("Cancelando...")
-            self.progress_dialog.cancel_button.setEnabled(False)
+        job.finished_signal.connect(self.organization_finished)
+        self.job_scheduler.submit(job)
         
     def organization_finished(self, success, processed_files):
-        # Fechar dialog de progresso
-        if self.progress_dialog:
-            self.progress_dialog.close()
-            self.progress_dialog = None
         if success and processed_files:
-            # Salvar no banco de dados
-            for file_info in processed_files:
-                self.db_manager.add_file(
-                    original_name=file_info['original_name'],
-                    stored_name=file_info['stored_name'],
-                    file_path=file_info['file_path'],
-                    file_size=file_info['file_size'],
-                    file_type=file_info['file_type'],
-                    category=self.organizer_thread.category)
-            QMessageBox.information(self, "Sucesso", f"{len(processed_files)} arquivos adicionados ao banco de dados!")
+            self.statusBar().showMessage(f"{len(processed_files)} arquivos adicionados ao banco de dados!", 8000)
             # Atualizar lista
+            self.refresh_files()
+            
+    def ask_backup_throughput(self):
+        mb_per_second, ok = QInputDialog.getInt(
+            self, "Limite de Velocidade",
+            "Velocidade máxima de cópia em MB/s (0 = sem limite):",
+            BACKUP_DEFAULT_MB_PER_SECOND, 0, 10000)
+        return mb_per_second * 1024 * 1024 if ok else None
+        
+    def create_backup(self):
+        backup_folder = QFileDialog.getExistingDirectory(self, "Selecionar pasta de backup")
+        if not backup_folder:
+            return
+        # Formato do snapshot
+        options = QMessageBox()
+        options.setWindowTitle("Formato do Backup")
+        options.setText("Como deseja gravar o backup?")
+        options.setIcon(QMessageBox.Question)
+        options.addButton("Pasta", QMessageBox.ActionRole)
+        archive_btn = options.addButton("Arquivo Único (.tar)", QMessageBox.ActionRole)
+        cancel_btn = options.addButton("Cancelar", QMessageBox.RejectRole)
+        options.exec_()
+        if options.clickedButton() == cancel_btn:
+            return
+        max_bytes_per_second = self.ask_backup_throughput()
+        if max_bytes_per_second is None:
+            return
+        # Incluir no snapshot os acessos que ainda estão em memória
+        self.access_tracker.flush()
+        job = BackupJob(
+            self.db_manager.db_path, backup_folder,
+            options.clickedButton() == archive_btn, max_bytes_per_second)
+        job.finished_signal.connect(self.job_finished_message)
+        self.job_scheduler.submit(job, JOB_PRIORITY_LOW)
+        
+    def restore_backup(self):
+        backup_folder = QFileDialog.getExistingDirectory(self, "Selecionar pasta de backup")
+        if not backup_folder:
+            return
+        index = load_backup_index(backup_folder)
+        if not index:
+            QMessageBox.warning(self, "Erro", "Nenhum backup encontrado nesta pasta!")
+            return
+        # Snapshots do mais recente para o mais antigo
+        labels = [f"{entry['name']} - {entry['file_count']} arquivos" for entry in reversed(index)]
+        label, ok = QInputDialog.getItem(
+            self, "Restaurar Backup", "Escolha o snapshot:", labels, 0, False)
+        if not ok:
+            return
+        snapshot_name = label.split(" - ")[0]
+        answer = QMessageBox.question(
+            self, "Restaurar Backup",
+            f"O banco de dados atual será substituído pelo snapshot {snapshot_name}. Continuar?",
+            QMessageBox.Yes | QMessageBox.No)
+        if answer != QMessageBox.Yes:
+            return
+        max_bytes_per_second = self.ask_backup_throughput()
+        if max_bytes_per_second is None:
+            return
+        self.access_tracker.flush()
+        job = RestoreJob(
+            self.db_manager, backup_folder, snapshot_name,
+            self.storage_folder, max_bytes_per_second)
+        job.finished_signal.connect(self.restore_finished)
+        self.job_scheduler.submit(job)
+        
+    def restore_finished(self, success, message):
+        self.job_finished_message(success, message)
+        if success:
             self.load_files_from_database()
-        # Reabilitar botões
-        self.ui.btn_add.setEnabled(True)
-        self.ui.btn_procurar.setEnabled(True)
-        self.ui.btn_atualizar.setEnabled(True)
             
+    def find_duplicates(self):
+        job = DuplicateFinderJob(self.db_manager)
+        job.finished_signal.connect(self.duplicates_found)
+        self.job_scheduler.submit(job, JOB_PRIORITY_LOW)
+        
+    def duplicates_found(self, success, duplicates):
+        if not success:
+            return
+        if not duplicates:
+            QMessageBox.information(self, "Duplicatas", "Nenhum arquivo duplicado encontrado!")
+            return
+        report = DuplicatesDialog(duplicates, self.db_manager, self.job_scheduler, self.format_file_size, self)
+        report.exec_()
+        if report.changed:
+            self.refresh_files()
+            
+    def schedule_maintenance(self):
+        # Não enfileirar outra se a anterior ainda não terminou
+        if self.job_scheduler.has_pending(MaintenanceJob):
+            return
+        self.job_scheduler.submit(MaintenanceJob(self.db_manager), JOB_PRIORITY_LOW)
+        
+    def run_database_maintenance(self):
+        job = MaintenanceJob(self.db_manager, full=True)
+        job.finished_signal.connect(self.database_maintenance_finished)
+        self.job_scheduler.submit(job)
+        
+    def database_maintenance_finished(self, success, result):
+        if not success:
+            QMessageBox.warning(self, "Erro", result)
+            return
+        before, after, released = result
+        
+        def fragmentation(report):
+            return (f"{report['fragmentation']:.1f}% ({report['free_pages']} de "
+                    f"{report['page_count']} páginas livres)")
+        objects = "".join(
+            f"{name}: {self.format_file_size(size)} em {pages} páginas, "
+            f"{self.format_file_size(unused)} sem uso<br>"
+            for name, pages, size, unused in after['objects']) or "Indisponível (dbstat)<br>"
+        plans = "".join(f"<b>{label}:</b> {'; '.join(plan)}<br>" for label, plan in after['query_plans'])
+        info_text = f"""
+        <b>Manutenção do Banco de Dados:</b><br><br>
+        <b>Tamanho:</b> {self.format_file_size(before['file_size'])} → {self.format_file_size(after['file_size'])}<br>
+        <b>Fragmentação antes:</b> {fragmentation(before)}<br>
+        <b>Fragmentação depois:</b> {fragmentation(after)}<br>
+        <b>Páginas liberadas:</b> {released}<br>
+        <b>Versão do esquema:</b> {after['schema_version']}<br>
+        <b>Auto vacuum:</b> {after['auto_vacuum']}<br>
+        <b>Estatísticas (ANALYZE):</b> {'Sim' if after['analyzed'] else 'Não'}<br><br>
+        <b>Espaço por tabela/índice:</b><br>{objects}<br>
+        <b>Índices usados pelas consultas:</b><br>{plans}"""
+        QMessageBox.information(self, "Manutenção do Banco de Dados", info_text)
+        
     def refresh_files(self):
         self.load_files_from_database(self.ui.search_edit.text().strip())
         
-    def on_item_double_click(self, item, column):
-        file_data = item.data(0, QtCore.Qt.UserRole)
-        if file_data:
-            if column == 6:  # Coluna "Ações"
-                self.download_file(file_data)
+    def on_item_double_click(self, index):
+        file_id = self.file_model.file_id(index)
+        if file_id is not None:
+            if index.column() == 6:  # Coluna "Ações"
+                self.download_file(file_id)
             else:
-                self.open_file(file_data)
+                self.open_file(file_id)
                 
     def closeEvent(self, event):
-        if self.organizer_thread and self.organizer_thread.isRunning():
-            self.organizer_thread.stop()
-            self.organizer_thread.wait()
         if self.search_thread and self.search_thread.isRunning():
             self.search_thread.stop()
             self.search_thread.wait()
-        if self.download_thread and self.download_thread.isRunning():
-            self.download_thread.terminate()
-            self.download_thread.wait()  
+        # Cancelar as tarefas na fila, parar as em execução e esperar que terminem
+        self.job_scheduler.shutdown()
+        # Gravar os acessos pendentes antes de sair
+        self.access_tracker.stop()
+        self.access_tracker.wait()
+        # Refazer as estatísticas do planejador ausentes ou desatualizadas
+        try:
+            self.db_manager.optimize()
+        except sqlite3.Error as e:
+            print(f"Erro ao otimizar banco de dados: {e}")
         event.accept()
 
 if __name__ == "__main__":